@@ -1,10 +1,28 @@
-"""MCP Codegen - Generate Python stubs from MCP servers."""
+"""MCP Codegen - Generate Python stubs from MCP servers.
+
+The CLI, code generator and MCPModule are imported on first access, so
+generated code importing mcp_codegen.runtime doesn't pay for them.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
 
-from .cli import main
-from .codegen import fetch_schema, render_module
-from .module import MCPModule
 from .constants import __version__, MCP_PROTOCOL_VERSION
 
+if TYPE_CHECKING:
+    from .cli import main
+    from .codegen import fetch_schema, render_module
+    from .module import MCPModule
+
+# Public name -> module that defines it (relative to this package)
+_LAZY_IMPORTS = {
+    "main": ".cli",
+    "fetch_schema": ".codegen",
+    "render_module": ".codegen",
+    "MCPModule": ".module",
+}
+
 __all__ = [
     "main",
     "fetch_schema", 
@@ -13,3 +31,16 @@ __all__ = [
     "__version__",
     "MCP_PROTOCOL_VERSION"
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
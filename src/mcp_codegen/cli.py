@@ -16,7 +16,7 @@ except ImportError:
     from typing_extensions import Literal
 from .codegen import fetch_schema, render_module, generate_fs_layout_wrapper
 from .constants import __version__, MCP_PROTOCOL_VERSION, CLIENT_NAME
-from .utils import read_first_sse_event, ensure_accept_headers
+from .utils import read_first_sse_event, ensure_accept_headers, use_client, _json_loads
 import httpx
 from urllib.parse import urlparse
 import ipaddress
@@ -209,7 +209,7 @@ def _run(file: str, code: str, servers_dir: str = "servers", workspace: str = ".
         sys.exit(1)
 
 
-async def _call(url: str, tool: str, args_list: list, timeout: float = None, json_output: bool = False, verbose: bool = False):
+async def _call(url: str, tool: str, args_list: list, timeout: float = None, json_output: bool = False, verbose: bool = False, client: httpx.AsyncClient | None = None, out=None):
     """Call an MCP tool directly without generating code.
 
     Args:
@@ -219,6 +219,9 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
         timeout: Request timeout in seconds
         json_output: Whether to output raw JSON-RPC result
         verbose: Whether to show additional debugging information
+        client: Optional httpx client to reuse (left open; a temporary
+            client is used if None)
+        out: Text stream for the result (default: sys.stdout)
 
     Arguments are automatically parsed as JSON if possible, otherwise treated as strings.
     """
@@ -245,7 +248,7 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
         "mcp-protocol-version": client_version,
     })
 
-    async with httpx.AsyncClient(headers=headers, timeout=timeout) as client:
+    async with use_client(client, timeout) as client:
         # Initialize to negotiate protocol version (no session ID for initialize)
         init_payload = {
             "jsonrpc": "2.0",
@@ -258,7 +261,7 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
             }
         }
         # Use streaming to handle both JSON and SSE responses
-        async with client.stream("POST", api_url, json=init_payload) as response:
+        async with client.stream("POST", api_url, json=init_payload, headers=headers, timeout=timeout) as response:
             response.raise_for_status()
             content_type = response.headers.get("content-type", "")
             # Extract session ID from response headers if present
@@ -270,18 +273,18 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
             else:
                 # Server responds with JSON
                 body = await response.aread()
-                init_data = json.loads(body.decode('utf-8'))
+                init_data = _json_loads(body)
 
         # Get server's protocol version
         server_version = init_data.get("result", {}).get("protocolVersion", client_version)
 
-        # Update headers with negotiated version
-        client._headers["mcp-protocol-version"] = server_version
+        # Update headers with negotiated version (per request, so a shared client is untouched)
+        headers["mcp-protocol-version"] = server_version
 
         # Add session ID if we got one, otherwise generate one
         if not session_id:
             session_id = str(uuid.uuid4())
-        client._headers["Mcp-Session-Id"] = session_id
+        headers["Mcp-Session-Id"] = session_id
 
         # Call the tool using negotiated version and session ID
         payload = {
@@ -291,7 +294,7 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
             "params": {"name": tool, "arguments": arguments}
         }
         # Use streaming for tools/call too
-        async with client.stream("POST", api_url, json=payload) as response:
+        async with client.stream("POST", api_url, json=payload, headers=headers, timeout=timeout) as response:
             response.raise_for_status()
             content_type = response.headers.get("content-type", "")
 
@@ -301,7 +304,7 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
             else:
                 # Server responds with JSON
                 body = await response.aread()
-                data = json.loads(body.decode('utf-8'))
+                data = _json_loads(body)
 
         if "error" in data:
             print(f"Error: {data['error']}", file=sys.stderr)
@@ -310,17 +313,17 @@ async def _call(url: str, tool: str, args_list: list, timeout: float = None, jso
         result = data.get("result", {})
         
         if json_output:
-            print(json.dumps(result, indent=2))
+            print(json.dumps(result, indent=2), file=out)
         else:
             content = result.get("content", [])
             if isinstance(content, list) and content:
                 for block in content:
                     if isinstance(block, dict) and "text" in block:
-                        print(block["text"])
+                        print(block["text"], file=out)
                     else:
-                        print(json.dumps(block, indent=2))
+                        print(json.dumps(block, indent=2), file=out)
             else:
-                print(json.dumps(result, indent=2))
+                print(json.dumps(result, indent=2), file=out)
 
 def main():
     p = argparse.ArgumentParser(prog="mcp-codegen", description="MCP client and code generator")
@@ -14,11 +14,18 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Literal, Optional
 import anyio
+import contextvars
 import httpx
 import uuid
-import json
 import asyncio
 
+# HTTP/2 needs the h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 from .exceptions import (
     TransportProbeError,
     VersionNegotiationError,
@@ -26,14 +33,81 @@ from .exceptions import (
     ToolCallError,
 )
 from .constants import MCP_PROTOCOL_VERSION, CLIENT_NAME, __version__
-from .utils import read_first_sse_event, ensure_accept_headers
+from .utils import read_first_sse_event, ensure_accept_headers, _json_loads
 
-__all__ = ["Client", "Transport"]
+__all__ = ["Client", "ConnectionPool", "Transport"]
 
 # Type alias for transport protocols
 Transport = Literal["streamable-http", "sse", "post"]
 
 
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=20)
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """A pooled transport that a Client's httpx.AsyncClient can't close."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Leave the pooled transport open; its ConnectionPool closes it."""
+
+
+class ConnectionPool:
+    """Connections shared by the Clients created inside an ``async with`` block.
+
+    Every Client of the same server opened in the block (including those of
+    generated tool calls) reuses the pool's open connections instead of
+    reconnecting and redoing TLS. Leaving the block closes them. Outside a
+    pool, each Client opens and closes its own connections.
+
+    Example:
+        async with ConnectionPool():
+            for city in cities:
+                await get_weather.call(url, get_weather.Params(city=city))
+    """
+
+    def __init__(self) -> None:
+        self._transports: dict[str, httpx.AsyncHTTPTransport] = {}
+        self._token: Optional[contextvars.Token[Optional[ConnectionPool]]] = None
+
+    async def __aenter__(self) -> ConnectionPool:
+        self._token = _ACTIVE_POOL.set(self)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._token is not None:
+            _ACTIVE_POOL.reset(self._token)
+            self._token = None
+        await self.aclose()
+
+    def transport(self, base_url: str) -> _SharedTransport:
+        """The pool's transport for base_url, created on first use."""
+        transport = self._transports.get(base_url)
+        if transport is None:
+            transport = self._transports[base_url] = httpx.AsyncHTTPTransport(limits=_POOL_LIMITS, http2=HTTP2_AVAILABLE)
+        return _SharedTransport(transport)
+
+    async def aclose(self) -> None:
+        """Close every pooled connection."""
+        transports = list(self._transports.values())
+        self._transports.clear()
+        for transport in transports:
+            await transport.aclose()
+
+
+# The pool of the innermost enclosing ``async with ConnectionPool()`` block.
+# A context variable, so it follows tasks under asyncio and trio alike and
+# nothing outlives the block that owns the connections.
+_ACTIVE_POOL: contextvars.ContextVar[Optional[ConnectionPool]] = contextvars.ContextVar(
+    "mcp_codegen_connection_pool", default=None
+)
+
+
 @dataclass(slots=True)
 class InitializeCache:
     """Caches initialization data from the MCP server.
@@ -49,9 +123,10 @@ class InitializeCache:
 class Client:
     """Centralized async client for MCP operations.
 
-    Owns a single httpx.AsyncClient with shared timeouts, retries,
-    transport probing, and protocol version negotiation. This class
-    eliminates code duplication and provides structured error handling.
+    Owns an httpx.AsyncClient with its own timeouts and cookies, drawing
+    connections from the enclosing ConnectionPool if there is one, and handles retries, transport probing, and protocol
+    version negotiation. This class eliminates code duplication and
+    provides structured error handling.
 
     Example:
         async with Client("https://api.example.com/mcp") as client:
@@ -102,7 +177,9 @@ class Client:
         """Close the HTTP client and release resources.
 
         This method should be called when the client is no longer needed
-        to properly clean up the underlying httpx.AsyncClient.
+        to properly clean up the underlying httpx.AsyncClient. Connections
+        from a ConnectionPool stay open for its other Clients until the
+        pool is closed.
         """
         if self._http:
             await self._http.aclose()
@@ -140,10 +217,13 @@ class Client:
         """Get or create HTTP client.
 
         Returns:
-            The cached or newly created httpx.AsyncClient instance
+            The cached or newly created httpx.AsyncClient instance, using
+            the active ConnectionPool's connections for this server
         """
         if self._http is None:
-            self._http = httpx.AsyncClient(timeout=self._timeout)
+            pool = _ACTIVE_POOL.get()
+            transport = pool.transport(self.base_url) if pool is not None else None
+            self._http = httpx.AsyncClient(timeout=self._timeout, transport=transport)
         return self._http
 
     async def _probe_transport(
@@ -237,7 +317,7 @@ class Client:
                     init_data = await read_first_sse_event(response)
                 else:
                     body = await response.aread()
-                    init_data = json.loads(body.decode('utf-8'))
+                    init_data = _json_loads(body)
 
                 # Check for initialization errors
                 if "error" in init_data:
@@ -326,7 +406,7 @@ class Client:
                         data = await read_first_sse_event(response)
                     else:
                         body = await response.aread()
-                        data = json.loads(body.decode('utf-8'))
+                        data = _json_loads(body)
 
                     # Check for JSON-RPC errors in response
                     if "error" in data:
@@ -6,11 +6,11 @@ This module provides functions to:
 - Support multiple transport protocols (streamable-http, SSE, HTTP POST)
 """
 from __future__ import annotations
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from textwrap import indent
 import anyio
 import httpx
-import json
+import os
 import uuid
 import keyword  # For reserved keyword checking
 try:
@@ -22,15 +22,30 @@ from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.client.sse import sse_client
 from .constants import __version__, MCP_PROTOCOL_VERSION, CLIENT_NAME, DEFAULT_WRITE_TIMEOUT, DEFAULT_POOL_TIMEOUT
-from .utils import read_first_sse_event, ensure_accept_headers
+from .utils import read_first_sse_event, ensure_accept_headers, use_client, _json_loads
 
 
 
+# Detected transports per (base URL, connect timeout, read timeout), where the
+# URL has no trailing slash. It is the URL the probes are derived from, so "x"
+# and "x/mcp" are cached apart: they probe different SSE endpoints. "unknown"
+# isn't cached: it usually means the server was unreachable at the time.
+_TRANSPORT_CACHE: Dict[Tuple[str, float, float], str] = {}
+
+
+def clear_transport_cache() -> None:
+    """Forget every transport cached by detect_transport(), so servers are probed again."""
+    _TRANSPORT_CACHE.clear()
+
+
 def detect_transport(base_url: str, timeout_connect: float = 1.5, timeout_read: float = 0.4, verbose: bool = False) -> str:
     """Detect which MCP transport a server supports.
 
     Uses fast probing to determine the best transport without waiting for timeouts.
     Based on MCP spec where servers expose /mcp for POST and optionally GET with SSE.
+    A detected transport is cached for the rest of the process, so each base
+    URL is probed once (a trailing slash is ignored); call
+    clear_transport_cache() to probe again.
 
     Args:
         base_url: MCP server base URL
@@ -42,6 +57,21 @@ def detect_transport(base_url: str, timeout_connect: float = 1.5, timeout_read:
         One of: "streamable-http", "sse", "http-post", or "unknown"
     """
     base = base_url.rstrip("/")
+    key = (base, timeout_connect, timeout_read)
+    transport = _TRANSPORT_CACHE.get(key)
+    if transport is not None:
+        if verbose:
+            print(f"Using cached transport for {base}: {transport}")
+        return transport
+
+    transport = _probe_transport(base, timeout_connect, timeout_read, verbose=verbose)
+    if transport != "unknown":
+        _TRANSPORT_CACHE[key] = transport
+    return transport
+
+
+def _probe_transport(base: str, timeout_connect: float, timeout_read: float, verbose: bool = False) -> str:
+    """Probe base (without trailing slash) for each transport in turn; see detect_transport."""
     mcp = base if base.endswith("/mcp") else f"{base}/mcp"
     sse = base if base.endswith("/sse") else f"{base}/sse"
     t = httpx.Timeout(
@@ -131,24 +161,28 @@ def detect_transport(base_url: str, timeout_connect: float = 1.5, timeout_read:
     # Couldn't confirm any known transport
     return "unknown"
 
-async def _session_streamable(url: str, headers: Dict[str, str] | None):
+async def _list_tools_streamable(url: str, headers: Dict[str, str] | None):
     # Ensure required Accept header is present for streamable-http transport
     merged_headers = ensure_accept_headers(headers)
+    # The session only works while its streams are open, so list tools inside;
+    # returns them as tools/list JSON dicts, like _fetch_http_post
     async with streamablehttp_client(url, headers=merged_headers) as (r, w, _):
-        s = ClientSession(r, w)
-        await s.initialize()
-        return s
+        async with ClientSession(r, w) as s:
+            await s.initialize()
+            tools = (await s.list_tools()).tools or []
+            return [t.model_dump(by_alias=True, exclude_none=True) for t in tools]
 
-async def _session_sse(url: str, headers: Dict[str, str] | None):
+async def _list_tools_sse(url: str, headers: Dict[str, str] | None):
     # Ensure required Accept header is present for SSE transport
     merged_headers = ensure_accept_headers(headers)
     async with sse_client(url, headers=merged_headers) as (r, w):
-        s = ClientSession(r, w)
-        await s.initialize()
-        return s
+        async with ClientSession(r, w) as s:
+            await s.initialize()
+            tools = (await s.list_tools()).tools or []
+            return [t.model_dump(by_alias=True, exclude_none=True) for t in tools]
 
 
-async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None, timeout_seconds: float = 7.0):
+async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None, timeout_seconds: float = 7.0, client: httpx.AsyncClient | None = None):
     """Fetch schema using HTTP POST transport with protocol version negotiation.
 
     Note: Some servers (like deepwiki) require Accept: application/json, text/event-stream
@@ -160,7 +194,7 @@ async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None,
     base_headers = ensure_accept_headers(headers)
     http_headers = {"mcp-protocol-version": client_version, **base_headers}
 
-    async with httpx.AsyncClient(headers=http_headers, timeout=timeout_seconds) as client:
+    async with use_client(client, timeout_seconds) as client:
         # Initialize and negotiate protocol version (no session ID for initialize)
         init_payload = {
             "jsonrpc": "2.0",
@@ -173,7 +207,7 @@ async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None,
             }
         }
         # Use streaming to handle both JSON and SSE responses
-        async with client.stream("POST", url, json=init_payload) as response:
+        async with client.stream("POST", url, json=init_payload, headers=http_headers, timeout=timeout_seconds) as response:
             response.raise_for_status()
             content_type = response.headers.get("content-type", "")
             # Extract session ID from response headers if present
@@ -185,7 +219,7 @@ async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None,
             else:
                 # Server responds with JSON
                 body = await response.aread()
-                init_data = json.loads(body.decode('utf-8'))
+                init_data = _json_loads(body)
 
         server_version = init_data.get("result", {}).get("protocolVersion", client_version)
 
@@ -206,7 +240,7 @@ async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None,
             "params": {}
         }
         # Use streaming for tools/list too
-        async with client.stream("POST", url, json=tools_payload, headers=http_headers) as response:
+        async with client.stream("POST", url, json=tools_payload, headers=http_headers, timeout=timeout_seconds) as response:
             response.raise_for_status()
             content_type = response.headers.get("content-type", "")
 
@@ -216,11 +250,11 @@ async def _fetch_http_post(base_url: str, headers: Dict[str, str] | None = None,
             else:
                 # Server responds with JSON
                 body = await response.aread()
-                data = json.loads(body.decode('utf-8'))
+                data = _json_loads(body)
 
         return data.get("result", {}).get("tools", [])
 
-async def fetch_schema(base_url: str, headers: Dict[str, str] | None = None, timeout_seconds: float = 7.0, transport: str = "auto", verbose: bool = False):
+async def fetch_schema(base_url: str, headers: Dict[str, str] | None = None, timeout_seconds: float = 7.0, transport: str = "auto", verbose: bool = False, client: httpx.AsyncClient | None = None):
     """Fetch tool schema from an MCP server with automatic transport detection.
 
     Uses fast probing to detect the best transport, then connects.
@@ -231,6 +265,8 @@ async def fetch_schema(base_url: str, headers: Dict[str, str] | None = None, tim
         timeout_seconds: Timeout for connection attempts
         transport: Transport protocol (auto, streamable-http, sse, http-post)
         verbose: Whether to show debugging information
+        client: Optional httpx client to reuse for the HTTP POST transport
+            (left open; a temporary client is used if None)
 
     Returns:
         List of tool definitions from the server
@@ -247,7 +283,7 @@ async def fetch_schema(base_url: str, headers: Dict[str, str] | None = None, tim
 
     # If we detected http-post, use it directly (don't try streaming transports)
     if detected_transport == "http-post":
-        tools_data = await _fetch_http_post(base, headers, timeout_seconds)
+        tools_data = await _fetch_http_post(base, headers, timeout_seconds, client)
     else:
         # Try streaming transports before falling back to HTTP POST
         preferred_transports: List[str] = []
@@ -266,18 +302,24 @@ async def fetch_schema(base_url: str, headers: Dict[str, str] | None = None, tim
                 # Add timeout to prevent hanging on incompatible servers
                 with anyio.fail_after(timeout_seconds):
                     if candidate == "streamable-http":
-                        s = await _session_streamable(http, headers)
+                        tools_data = await _list_tools_streamable(http, headers)
                     else:  # candidate == "sse"
-                        s = await _session_sse(sse, headers)
-                    tools = (await s.list_tools()).tools or []
-                    return tools
+                        tools_data = await _list_tools_sse(sse, headers)
+                    return _tools_from_dicts(tools_data)
             except Exception:
                 continue
 
         # All streaming transports failed - use HTTP POST as fallback
-        tools_data = await _fetch_http_post(base, headers, timeout_seconds)
+        tools_data = await _fetch_http_post(base, headers, timeout_seconds, client)
+
+    return _tools_from_dicts(tools_data)
+
+def _tools_from_dicts(tools_data: List[Dict[str, Any]]) -> List[Any]:
+    """Convert JSON tool definitions (as in a tools/list result) to tool objects.
 
-    # Convert dict tools to object-like tools
+    The objects expose name, description and input_schema like the tools
+    returned by the MCP client session.
+    """
     tools = []
     for t in tools_data:
         schema_dict = t.get('inputSchema', {})
@@ -587,8 +629,16 @@ def generate_fs_layout_wrapper(
     base_url: str,
     module_name: str,
     tools,
-    output_dir: str = "servers"
+    output_dir: str = "servers",
+    subdir: str | None = None
 ) -> None:
-    """Generate filesystem layout (wrapper for fs_layout module)."""
+    """Generate filesystem layout (wrapper for fs_layout module).
+
+    The server package is written to output_dir/<module_name>, or to
+    output_dir/<subdir>/<module_name> when subdir is given (e.g.
+    subdir="servers" to generate straight into a project's servers/).
+    """
     from .fs_layout import generate_fs_layout as _generate
+    if subdir:
+        output_dir = os.path.join(output_dir, subdir)
     _generate(base_url, module_name, tools, output_dir)
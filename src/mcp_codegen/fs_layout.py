@@ -10,6 +10,8 @@ import re
 import keyword
 from pathlib import Path
 from .codegen import _pydantic_model_for_params, _py_name
+from .runtime.search import build_search_index
+from .runtime.tool_index import docstring_summary, write_server_index
 
 def generate_fs_layout(
     base_url: str,
@@ -29,6 +31,7 @@ def generate_fs_layout(
         servers/<module_name>/
             __init__.py          # Server index with metadata
             <tool_name>.py       # Individual tool files
+            .index.json          # (tool, summary) pairs for search_tools
     """
     # Get actual protocol version from tools (negotiated during fetch_schema)
     # This ensures generated files have the correct version
@@ -79,6 +82,7 @@ def generate_fs_layout(
 
     # Generate individual tool files
     tool_info = []  # Collect for __init__.py
+    summaries = []  # Collect for the server's search index
     for tool in tools:
         # Use safe identifier to prevent collisions
         tool_name = _safe_identifier(tool.name, is_class=False)
@@ -97,6 +101,7 @@ Module: {module_name}
 Tool: {original_name}
 """
 
+from functools import partial
 from typing import Annotated, Literal, Any, Dict
 from pydantic import BaseModel, Field
 import anyio
@@ -143,7 +148,8 @@ def call_sync(
     Returns:
         Tool result
     """
-    return anyio.run(call, base_url, params, headers=headers)
+    # anyio.run() only passes positional arguments on
+    return anyio.run(partial(call, base_url, params, headers=headers))
 '''
 
         # Write tool file
@@ -156,6 +162,7 @@ def call_sync(
             "original_name": original_name,
             "description": getattr(tool, 'description', '')
         })
+        summaries.append((tool_name, docstring_summary(tool_file_content)))
 
     # Generate __init__.py with index
     init_content = f'''"""MCP Server: {module_name}
@@ -196,5 +203,10 @@ SERVER_TOOLS = {tool_info}
     init_file_path = server_dir / "__init__.py"
     init_file_path.write_text(init_content, encoding="utf-8")
 
+    # Save the summaries next to the tools and index the servers directory
+    # now, so search_tools doesn't read every tool file
+    write_server_index(str(server_dir), summaries)
+    build_search_index(output_dir)
+
     print(f"✓ Generated filesystem layout → {server_dir}/")
     print(f"  {len(tool_info)} tool(s) in {len(list(server_dir.glob('*.py')))} files")
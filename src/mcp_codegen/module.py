@@ -125,7 +125,8 @@ class MCPModule:
                 from .utils import read_first_sse_event
                 data = await read_first_sse_event(resp)   # resp is a streaming Response
             else:
-                data = json.loads((await resp.aread()).decode("utf-8"))
+                from .utils import _json_loads
+                data = _json_loads(await resp.aread())
 
             if "error" in data:
                 raise RuntimeError(json.dumps(data["error"], ensure_ascii=False))
@@ -5,6 +5,7 @@ sending everything to the model (Anthropic's "write to workspace" pattern).
 """
 from __future__ import annotations
 import json
+import os
 from pathlib import Path
 from typing import Any, Optional
 import sys
@@ -53,11 +54,28 @@ class Workspace:
         """
         file_path = self.root / path
 
-        if not file_path.exists():
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except FileNotFoundError:
             return None
 
-        with file_path.open('r', encoding='utf-8') as f:
-            return f.read()
+        # Read the whole file at its known size and decode once, rather than
+        # streaming through a TextIOWrapper
+        try:
+            chunks: list[bytes] = []
+            remaining = os.fstat(fd).st_size
+            while remaining > 0:
+                chunk = os.read(fd, remaining)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+        finally:
+            os.close(fd)
+
+        # Translate newlines like text-mode open() did
+        text = b"".join(chunks).decode('utf-8')
+        return text.replace('\r\n', '\n').replace('\r', '\n')
 
     def list(self, pattern: str = "*") -> list[str]:
         """List files in workspace.
@@ -6,11 +6,45 @@ This module provides:
 - logger: Structured logging with PII scrubbing
 - scrub: Manual PII scrubbing function
 - Client: Async HTTP client for MCP tool calls
+- ConnectionPool: Shares connections between tool calls in an async with block
+
+Names are imported on first access (PEP 562), so e.g. searching tools
+never loads the HTTP client or the runner.
 """
 from __future__ import annotations
 
-from .search import search_tools
-from ..client import Client
-from ..runner import workspace, logger, scrub
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .search import search_tools, ToolRef, list_servers, list_tools
+    from ..client import Client, ConnectionPool
+    from ..runner import workspace, logger, scrub
+
+# Public name -> module that defines it (relative to this package)
+_LAZY_IMPORTS = {
+    "search_tools": ".search",
+    "ToolRef": ".search",
+    "list_servers": ".search",
+    "list_tools": ".search",
+    "Client": "..client",
+    "ConnectionPool": "..client",
+    "workspace": "..runner",
+    "logger": "..runner",
+    "scrub": "..runner",
+}
+
+__all__ = ["search_tools", "ToolRef", "list_servers", "list_tools", "workspace", "logger", "scrub", "Client", "ConnectionPool"]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
 
-__all__ = ["search_tools", "workspace", "logger", "scrub", "Client"]
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -7,6 +7,6 @@ to support the import pattern used in fs-layout generated code:
 """
 from __future__ import annotations
 
-from ..client import Client
+from ..client import Client, ConnectionPool
 
-__all__ = ["Client"]
+__all__ = ["Client", "ConnectionPool"]
@@ -4,16 +4,42 @@ search_tools() enables finding MCP tools without loading full schemas,
 matching Anthropic's "progressive disclosure" pattern.
 """
 from __future__ import annotations
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Callable, Iterable, Optional, Literal, Sequence, Tuple, Union
+import functools
+import hashlib
 import importlib.util
+import json
 import os
-from pathlib import Path
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .tool_index import SERVER_INDEX_FILE, file_summary, read_server_index, write_json
+
+# Multi-token queries are matched in one pass when pyahocorasick is installed
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 DetailLevel = Literal["name", "basic", "full"]
 
+# Trigram index over every tool's server name, tool name and summary, saved
+# in the servers directory by the generator (and by searches that had to
+# update it) so searches don't reread each tool file
+INDEX_FILE = ".search_index.json"
+_INDEX_VERSION = 3
+
+@dataclass(frozen=True, slots=True)
 class ToolRef:
     """Reference to a tool without loading full module.
 
+    Immutable and hashable by (server, tool, module_path); the summary and
+    module are filled in lazily and don't affect equality.
+
     Attributes:
         server: Server name
         tool: Tool name
@@ -21,28 +47,24 @@ class ToolRef:
         summary: Short description (from metadata or file header)
         loaded: Whether module has been imported
     """
-    def __init__(
-        self,
-        server: str,
-        tool: str,
-        module_path: str,
-        summary: str = ""
-    ):
-        self.server = server
-        self.tool = tool
-        self.module_path = module_path
-        self.summary = summary
-        self.loaded = False
-        self._module = None
+    server: str
+    tool: str
+    module_path: str
+    summary: str = field(default="", compare=False)
+    loaded: bool = field(default=False, init=False, compare=False)
+    _module: Any = field(default=None, init=False, repr=False, compare=False)
 
     def load(self) -> Any:
-        """Load the tool module on demand."""
+        """Load the tool module on demand.
+
+        The module is registered in sys.modules under a private name (see
+        _tool_module_name), so every ToolRef for the same file shares one
+        module and later loads are a dict lookup.
+        """
         if not self.loaded:
-            spec = importlib.util.spec_from_file_location(f"{self.server}_{self.tool}", self.module_path)
-            if spec and spec.loader:
-                self._module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(self._module)
-                self.loaded = True
+            qualname = _tool_module_name(self.server, self.tool, self.module_path)
+            object.__setattr__(self, "_module", _cached_import(qualname, self.module_path))
+            object.__setattr__(self, "loaded", True)
         return self._module
 
     async def invoke(self, base_url: str, params: Any) -> Any:
@@ -62,60 +84,445 @@ class ToolRef:
     def get_summary(self) -> str:
         """Extract summary from file header without loading module.
 
-        Uses AST parsing to extract module docstring without executing code.
-        More robust than regex, handles edge cases like encoding declarations.
+        Reads at most the first 4 KiB of the file and scans it for the
+        module docstring, without parsing or executing any code. Results
+        are cached per file and modification time.
         """
         if self.summary:
             return self.summary
 
         try:
-            # Read only first 2KB to avoid parsing large files
-            with open(self.module_path, 'r', encoding='utf-8') as f:
-                content = f.read(2048)
+            mtime_ns = os.stat(self.module_path).st_mtime_ns
+            object.__setattr__(self, "summary", _read_summary(self.module_path, mtime_ns))
+        except OSError:
+            pass  # Keep empty summary if the file can't be read
+
+        return self.summary
+
+# Package-less namespace for tool modules loaded by ToolRef.load(). A name
+# like "servers.github.create_pr" would shadow (or be shadowed by) a real
+# servers package imported from sys.path.
+_TOOL_NAMESPACE = "_mcp_codegen_tools"
+
+@functools.lru_cache(maxsize=256)
+def _servers_dir_key(servers_dir: str) -> str:
+    """Short, stable identifier of an absolute servers directory."""
+    return hashlib.sha1(servers_dir.encode("utf-8")).hexdigest()[:12]
+
+def _tool_module_name(server: str, tool: str, module_path: str) -> str:
+    """sys.modules name for a tool file, e.g. _mcp_codegen_tools.<key>.github.create_pr.
 
-            # Use AST to safely parse and extract docstring (no execution)
-            import ast
+    The key identifies the servers directory, so same-named servers and
+    tools in different directories get different modules.
+    """
+    servers_dir = os.path.dirname(os.path.dirname(os.path.abspath(module_path)))
+    return f"{_TOOL_NAMESPACE}.{_servers_dir_key(servers_dir)}.{server}.{tool}"
+
+# Names of the tool modules _cached_import has put into sys.modules
+_LOADED: set[str] = set()
+
+def _cleanup_loaded() -> None:
+    """Remove tool modules loaded by ToolRef.load() from sys.modules.
+
+    Only touches the names recorded in _LOADED, so it doesn't scan all of
+    sys.modules. Meant for tests that load tools from temporary dirs.
+    """
+    for qualname in _LOADED:
+        sys.modules.pop(qualname, None)
+    _LOADED.clear()
+
+def _cached_import(qualname: str, path: str) -> Any:
+    """Import the file at path as module qualname, reusing sys.modules."""
+    module = sys.modules.get(qualname)
+    if module is not None:
+        return module
+
+    spec = importlib.util.spec_from_file_location(qualname, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load tool module from {path}", name=qualname, path=path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered before exec, like a regular import, so Pydantic can resolve annotations
+    sys.modules[qualname] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(qualname, None)
+        raise
+    _LOADED.add(qualname)
+    return module
+
+@functools.lru_cache(maxsize=4096)
+def _read_summary(module_path: str, mtime_ns: int) -> str:
+    """file_summary, cached per file (mtime_ns only keys the cache)."""
+    return file_summary(module_path)
+
+def _trigrams(text: str) -> set[str]:
+    """All 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared thread pool for scanning servers, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="mcp-codegen-search")
+        return _executor
+
+def _scan_server(servers_dir: str, server: str) -> List[Tuple[str, str, int, int]]:
+    """(server, tool, mtime_ns, size) for each of a server's tool files, sorted by tool."""
+    files = []
+    try:
+        with os.scandir(os.path.join(servers_dir, server)) as it:
+            for entry in it:
+                if entry.name.endswith('.py') and entry.name != '__init__.py' and entry.is_file():
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Removed since it was listed
+                    files.append((server, entry.name[:-3], st.st_mtime_ns, st.st_size))
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return sorted(files)
+
+def _map_servers(func: Callable[[str], List[Any]], servers: Sequence[str]) -> List[Any]:
+    """Concatenated func(server) results, in servers order.
+
+    Servers are handled concurrently; the work is mostly directory reads,
+    stat calls and small file reads, which release the GIL.
+    """
+    if len(servers) > 1:
+        # map() yields in submission order, so results stay in servers order
+        results = _get_executor().map(func, servers)
+    else:
+        results = [func(server) for server in servers]
+    return [item for result in results for item in result]
+
+def _collect_server_docs(
+    servers_dir: str,
+    files: Sequence[Tuple[str, str, int, int]],
+    known: Dict[Tuple[str, str], Tuple[str, List[int]]],
+    reference_ns: int,
+) -> List[Tuple[List[str], List[int]]]:
+    """([server, tool, summary], [mtime_ns, size]) for one server's tool files.
+
+    A summary is reused from known (an earlier index) when the file's mtime
+    and size match its entry and it was modified before reference_ns. Like
+    git's racy-clean check, a file modified later may have changed again
+    within the same timestamp tick. Other summaries come from the server's
+    SERVER_INDEX_FILE under the same rules, or from the file itself.
+    """
+    server_index: Optional[Tuple[int, Dict[str, List[Any]]]] = None
+    docs = []
+    for server, tool, mtime_ns, size in files:
+        stat = [mtime_ns, size]
+        entry = known.get((server, tool))
+        if entry is not None and entry[1] == stat and mtime_ns < reference_ns:
+            docs.append(([server, tool, entry[0]], stat))
+            continue
+
+        if server_index is None:
+            server_index = read_server_index(os.path.join(servers_dir, server)) or (0, {})
+        index_mtime, entries = server_index
+        saved = entries.get(tool)
+        if saved is not None and saved[1:] == stat and mtime_ns < index_mtime:
+            summary = saved[0]
+        else:
             try:
-                node = ast.parse(content)
-                doc = ast.get_docstring(node)
-
-                if doc:
-                    # Extract summary from docstring (before first blank line or Params section)
-                    lines = doc.split('\n')
-                    summary_lines = []
-                    for line in lines:
-                        if line.strip() == '' or 'Params' in line:
-                            break
-                        summary_lines.append(line.strip())
-                    self.summary = ' '.join(summary_lines)
-            except SyntaxError:
-                # Fallback to regex if AST parsing fails
-                import re
-                docstring_match = re.search(r'^\\s*"""(.+?)"""', content, re.DOTALL | re.MULTILINE)
-                if docstring_match:
-                    docstring = docstring_match.group(1).strip()
-                    lines = docstring.split('\n')
-                    summary_lines = []
-                    for line in lines:
-                        if line.strip() == '' or 'Params' in line:
-                            break
-                        summary_lines.append(line.strip())
-                    self.summary = ' '.join(summary_lines)
-
-        except Exception:
-            pass  # Keep empty summary if parsing fails
+                summary = file_summary(os.path.join(servers_dir, server, f"{tool}.py"))
+            except OSError:
+                summary = ""  # Removed since it was scanned
+        docs.append(([server, tool, summary], stat))
+    return docs
+
+def _server_mtimes(servers_dir: str) -> Dict[str, int]:
+    """Server name -> st_mtime_ns of its directory, for each server (see list_servers).
+
+    A directory's mtime changes when tool files are added, removed or
+    renamed in it, and the generator replaces its SERVER_INDEX_FILE on
+    every run. So these stats tell which servers to rescan without
+    touching their tool files.
+    """
+    mtimes = {}
+    try:
+        with os.scandir(servers_dir) as it:
+            for entry in it:
+                if entry.name.startswith('.') or not entry.is_dir():
+                    continue
+                try:
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue  # Removed since it was listed
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return mtimes
+
+def _build_index(
+    servers_dir: str,
+    reference_ns: int,
+    dirs: Dict[str, int],
+    previous: Optional[Dict[str, Any]] = None,
+    recheck: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Index the trigrams of each tool's text in a servers directory.
+
+    dirs is _server_mtimes(servers_dir), taken after reference_ns. Servers
+    whose directory mtime is unchanged since previous (an earlier index)
+    and that aren't in recheck keep their docs from it. The others are
+    rescanned, reusing the summaries still current in previous.
+
+    Returns a dict with "reference_ns", "dirs" (the directory mtimes; -1 for
+    one modified after reference_ns, which could change again within the
+    same timestamp tick), "docs" ([server, tool, summary] per tool,
+    sorted), "stats" ([mtime_ns, size] of each doc's file) and "trigrams"
+    (trigram -> ascending doc ids into "docs").
+    """
+    old_dirs: Dict[str, int] = {}
+    old_docs: Dict[str, List[Tuple[List[str], List[int]]]] = {}
+    known: Dict[Tuple[str, str], Tuple[str, List[int]]] = {}
+    previous_reference = 0
+    if previous is not None:
+        old_dirs = previous["dirs"]
+        previous_reference = previous["reference_ns"]
+        # Equal lengths are checked by _read_index; a mismatch means a corrupt index
+        for doc, stat in zip(previous["docs"], previous["stats"], strict=True):
+            server, tool, summary = doc
+            old_docs.setdefault(server, []).append((doc, stat))
+            known[(server, tool)] = (summary, stat)
+
+    servers = sorted(dirs)
+    recheck = set(recheck)
+    rescan = [server for server in servers if old_dirs.get(server) != dirs[server] or server in recheck]
+
+    def collect(server: str) -> List[Tuple[str, List[Tuple[List[str], List[int]]]]]:
+        files = _scan_server(servers_dir, server)
+        return [(server, _collect_server_docs(servers_dir, files, known, previous_reference))]
+
+    scanned = dict(_map_servers(collect, rescan))
+    collected = [item for server in servers for item in scanned.get(server, old_docs.get(server, []))]
+    docs = [doc for doc, _ in collected]
+    stats = [stat for _, stat in collected]
+
+    if previous is not None and docs == previous["docs"]:
+        trigrams = previous["trigrams"]
+    else:
+        trigrams = {}
+        for doc_id, (server, tool, summary) in enumerate(docs):
+            for gram in _trigrams(f"{server}\n{tool}\n{summary}".lower()):
+                trigrams.setdefault(gram, []).append(doc_id)
+
+    return {
+        "version": _INDEX_VERSION,
+        "reference_ns": reference_ns,
+        "dirs": {server: mtime if mtime < reference_ns else -1 for server, mtime in dirs.items()},
+        "docs": docs,
+        "stats": stats,
+        "trigrams": trigrams,
+    }
+
+def _read_index(servers_dir: str) -> Optional[Dict[str, Any]]:
+    """The index saved in a servers directory's INDEX_FILE, or None if it's
+    missing, unreadable, from another version or inconsistent."""
+    try:
+        with open(os.path.join(servers_dir, INDEX_FILE), "rb") as f:
+            index = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != _INDEX_VERSION:
+        return None
+    if len(index["docs"]) != len(index["stats"]):
+        return None
+    return index
+
+# Files and directories modified less than this long before a scan may still
+# change within the same timestamp tick (2 s covers even FAT's granularity),
+# so an index built by the scan doesn't vouch for them
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Absolute servers dir -> the index last loaded or built for it, so repeated
+# searches skip reading INDEX_FILE. Concurrent searches may both rebuild an
+# entry; the last one wins, which is harmless.
+_INDEX_CACHE: Dict[str, Dict[str, Any]] = {}
+
+def _load_index(servers_dir: str, recheck: Iterable[str] = ()) -> Dict[str, Any]:
+    """Index of a servers directory, brought up to date with its servers.
+
+    Starts from the in-memory index, else the saved INDEX_FILE. If no
+    server directory changed since and nothing is to be rechecked, it's
+    used as is, so a search costs a stat per server rather than per tool.
+    Otherwise the changed servers (and those in recheck) are rescanned, and
+    the rebuilt index is cached and saved for later processes.
+    """
+    # Taken before any stat, so a later change is newer than this
+    reference_ns = time.time_ns() - _RACY_WINDOW_NS
+    key = os.path.abspath(servers_dir)
+    previous = _INDEX_CACHE.get(key) or _read_index(servers_dir)
+    dirs = _server_mtimes(servers_dir)
+
+    if previous is not None and previous["dirs"] == dirs and not recheck:
+        index = previous
+    else:
+        index = _build_index(servers_dir, reference_ns, dirs, previous, recheck)
+        write_json(os.path.join(servers_dir, INDEX_FILE), index)
+    _INDEX_CACHE[key] = index
+    return index
+
+def _stale_servers(servers_dir: str, index: Dict[str, Any], doc_ids: Iterable[int]) -> set[str]:
+    """Servers of the given docs whose tool file changed since the index was built.
+
+    A file edited in place leaves its directory's mtime alone, so this
+    stats the files themselves. Files modified after the index's
+    reference_ns count as changed, as they may be racily clean.
+    """
+    docs, stats, reference_ns = index["docs"], index["stats"], index["reference_ns"]
+    stale: set[str] = set()
+    for doc_id in doc_ids:
+        server, tool, _ = docs[doc_id]
+        if server in stale:
+            continue
+        try:
+            st = os.stat(os.path.join(servers_dir, server, f"{tool}.py"))
+        except OSError:
+            stale.add(server)
+            continue
+        if [st.st_mtime_ns, st.st_size] != stats[doc_id] or st.st_mtime_ns >= reference_ns:
+            stale.add(server)
+    return stale
 
-        return self.summary
+def build_search_index(servers_dir: str = "servers") -> None:
+    """(Re)build and save the search index for a servers directory.
+
+    Called after generating a filesystem layout, so the first search
+    doesn't have to read every tool file.
+    """
+    reference_ns = time.time_ns() - _RACY_WINDOW_NS
+    index = _build_index(servers_dir, reference_ns, _server_mtimes(servers_dir))
+    write_json(os.path.join(servers_dir, INDEX_FILE), index)
+
+def _intersect_sorted(a: Sequence[int], b: Sequence[int]) -> List[int]:
+    """Sort-merge intersection of two ascending lists of doc ids."""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def _candidates(index: Dict[str, Any], query: str) -> Sequence[int]:
+    """Doc ids containing every trigram of the (lowercased) query.
+
+    Queries shorter than 3 characters have no trigrams and match all docs;
+    callers still have to check the query against each candidate.
+    """
+    grams = _trigrams(query)
+    if not grams:
+        return range(len(index["docs"]))
+
+    postings = index["trigrams"]
+    # Intersect shortest lists first so the running result stays small
+    lists = sorted((postings.get(gram, []) for gram in grams), key=len)
+    result = lists[0]
+    for other in lists[1:]:
+        if not result:
+            break
+        result = _intersect_sorted(result, other)
+    return result
+
+def _any_candidates(index: Dict[str, Any], tokens: Sequence[str]) -> Sequence[int]:
+    """Doc ids that may contain any of the tokens, ascending."""
+    if len(tokens) == 1:
+        return _candidates(index, tokens[0])
+    return sorted(set().union(*(_candidates(index, token) for token in tokens)))
+
+def _contains_any(tokens: Sequence[str]) -> Callable[[str], bool]:
+    """Predicate: does a text contain at least one of the tokens?
+
+    Several tokens are matched in one pass by an Aho-Corasick automaton
+    when pyahocorasick is installed, else with one substring check each.
+    """
+    if "" in tokens:
+        return lambda text: True
+    if len(tokens) > 1 and AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for i, token in enumerate(tokens):
+            automaton.add_word(token, i)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text), None) is not None
+    return lambda text: any(token in text for token in tokens)
+
+# From this many tools on, substring filtering is vectorized with numpy (if
+# installed); below it, the trigram index is faster than numpy's setup cost
+_NUMPY_MIN_DOCS = 1024
+
+@functools.lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """The numpy module, or None if it isn't installed (imported on first use)."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _numpy_matches(index: Dict[str, Any], tokens: Sequence[str], with_summary: bool) -> List[int]:
+    """Doc ids matching any token, from np.char.find over the whole index.
+
+    The lowercased name and summary arrays are built on first use and kept
+    on the (in-memory) index under "_arrays".
+    """
+    np = _numpy()
+    arrays = index.get("_arrays")
+    if arrays is None:
+        docs = index["docs"]
+        arrays = index["_arrays"] = (
+            np.array([f"{server}\n{tool}".lower() for server, tool, _ in docs]),
+            np.array([summary.lower() for _, _, summary in docs]),
+        )
+    names, summaries = arrays
+
+    mask = np.zeros(len(names), dtype=bool)
+    for token in tokens:
+        mask |= np.char.find(names, token) >= 0
+        if with_summary:
+            mask |= np.char.find(summaries, token) >= 0
+    return np.flatnonzero(mask).tolist()
+
+def _match_docs(index: Dict[str, Any], tokens: Sequence[str], with_summary: bool) -> List[int]:
+    """Ids of the docs matching any token, ascending.
+
+    Server and tool names are always checked, summaries only if
+    with_summary.
+    """
+    docs = index["docs"]
+    if len(docs) >= _NUMPY_MIN_DOCS and _numpy() is not None:
+        return _numpy_matches(index, tokens, with_summary)
+
+    matches = _contains_any(tokens)
+    doc_ids = []
+    for doc_id in _any_candidates(index, tokens):
+        server_name, tool_name, summary = docs[doc_id]
+        text = f"{server_name}\n{tool_name}\n{summary}" if with_summary else f"{server_name}\n{tool_name}"
+        if matches(text.lower()):
+            doc_ids.append(doc_id)
+    return doc_ids
 
 def search_tools(
-    query: str,
+    query: Union[str, Iterable[str]],
     servers_dir: str = "servers",
     detail: DetailLevel = "name"
 ) -> List[ToolRef]:
     """Search for tools matching query.
 
     Args:
-        query: Search query (matches server name, tool name, or summary)
+        query: Search query (matches server name, tool name, or summary),
+            or several queries, matching tools that match any of them
         servers_dir: Base directory containing server folders
         detail: Level of detail to load ("name", "basic", "full")
 
@@ -134,65 +541,37 @@ def search_tools(
 
             # Or use convenience method for async calls
             result = await tool.invoke(base_url, module.Params(...))
+
+        # Either word anywhere
+        tools = search_tools(["temperature", "temp"])
     """
     results: List[ToolRef] = []
 
-    servers_path = Path(servers_dir)
-    if not servers_path.exists():
+    tokens = [query.lower()] if isinstance(query, str) else [token.lower() for token in query]
+    if not tokens or not os.path.isdir(servers_dir):
         return results
 
-    # Search through server directories
-    for server_dir in servers_path.iterdir():
-        if not server_dir.is_dir() or server_dir.name.startswith('.'):
-            continue
-
-        server_name = server_dir.name
-
-        # Check __init__.py for server metadata
-        init_file = server_dir / "__init__.py"
-        server_tools: List[Dict[str, Any]] = []
-        if init_file.exists():
-            try:
-                # Try to load server metadata (if available)
-                spec = importlib.util.spec_from_file_location(f"{server_name}_init", str(init_file))
-                if spec and spec.loader:
-                    init_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(init_module)
-                    server_tools = getattr(init_module, 'SERVER_TOOLS', [])
-            except Exception:
-                pass  # Skip if can't load
-
-        # Search through tool files
-        for tool_file in server_dir.glob("*.py"):
-            if tool_file.name == "__init__.py":
-                continue
-
-            tool_name = tool_file.stem
-
-            # Check if matches query (server name, tool name always checked)
-            query_lower = query.lower()
-            if query_lower in server_name.lower() or query_lower in tool_name.lower():
-                # Quick match without loading summary
-                results.append(ToolRef(
-                    server=server_name,
-                    tool=tool_name,
-                    module_path=str(tool_file),
-                    summary=""  # Will be loaded on demand
-                ))
-                continue
-
-            # For full/basic detail mode, check summary
-            if detail in ("basic", "full"):
-                # Create temporary ToolRef and extract summary
-                temp_ref = ToolRef(
-                    server=server_name,
-                    tool=tool_name,
-                    module_path=str(tool_file)
-                )
-                summary = temp_ref.get_summary()
-
-                if query_lower in summary.lower():
-                    results.append(temp_ref)
+    index = _load_index(servers_dir)
+    # Summaries are only searched (and returned) above the "name" detail level
+    with_summary = detail in ("basic", "full")
+    doc_ids = _match_docs(index, tokens, with_summary)
+    if with_summary:
+        # Directory mtimes miss tool files edited in place, so check the
+        # matched ones and match again if their servers had to be rescanned
+        stale = _stale_servers(servers_dir, index, doc_ids)
+        if stale:
+            index = _load_index(servers_dir, recheck=stale)
+            doc_ids = _match_docs(index, tokens, with_summary)
+
+    docs = index["docs"]
+    for doc_id in doc_ids:
+        server_name, tool_name, summary = docs[doc_id]
+        results.append(ToolRef(
+            server=server_name,
+            tool=tool_name,
+            module_path=os.path.join(servers_dir, server_name, f"{tool_name}.py"),
+            summary=summary if with_summary else ""  # Loaded on demand otherwise
+        ))
 
     return results
 
@@ -203,17 +582,17 @@ def list_servers(servers_dir: str = "servers") -> List[str]:
         servers_dir: Base directory containing server folders
 
     Returns:
-        List of server names
+        List of server names, sorted
     """
-    servers_path = Path(servers_dir)
-    if not servers_path.exists():
+    try:
+        with os.scandir(servers_dir) as it:
+            return sorted(
+                entry.name for entry in it
+                if not entry.name.startswith('.') and entry.is_dir()
+            )
+    except (FileNotFoundError, NotADirectoryError):
         return []
 
-    return [
-        d.name for d in servers_path.iterdir()
-        if d.is_dir() and not d.name.startswith('.')
-    ]
-
 def list_tools(server: str, servers_dir: str = "servers") -> List[str]:
     """List all tools for a server.
 
@@ -222,15 +601,13 @@ def list_tools(server: str, servers_dir: str = "servers") -> List[str]:
         servers_dir: Base directory containing server folders
 
     Returns:
-        List of tool names
+        List of tool names, sorted
     """
-    server_path = Path(servers_dir) / server
-    if not server_path.exists():
+    try:
+        with os.scandir(os.path.join(servers_dir, server)) as it:
+            return sorted(
+                entry.name[:-3] for entry in it
+                if entry.name.endswith('.py') and entry.name != '__init__.py' and entry.is_file()
+            )
+    except (FileNotFoundError, NotADirectoryError):
         return []
-
-    tools = []
-    for py_file in server_path.glob("*.py"):
-        if py_file.name != "__init__.py":
-            tools.append(py_file.stem)
-
-    return tools
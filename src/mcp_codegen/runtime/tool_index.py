@@ -0,0 +1,111 @@
+"""Tool summaries and the per-server summary index.
+
+Shared by the filesystem-layout generator, which writes each server's
+SERVER_INDEX_FILE, and by search_tools(), which reads it. Only uses the
+standard library, so importing it stays cheap at runtime.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import contextlib
+import json
+import os
+import threading
+
+# [tool, summary, mtime_ns, size] for one server, written next to its tool files by
+# the generator, so indexing reads one file per server instead of one per tool
+SERVER_INDEX_FILE = ".index.json"
+
+# Module docstrings of generated tools sit at the top, well within this
+SUMMARY_READ_BYTES = 4096
+
+def docstring_summary(source: str) -> str:
+    """Summary from the module docstring at the start of source.
+
+    Skips blank lines and comments (shebang, encoding declaration); the
+    first other line must open a string literal, else there's no
+    docstring. The summary is the docstring up to its first blank line or
+    Params section, joined into one line. A docstring cut off by the read
+    limit is used as far as it goes.
+    """
+    pos = 0
+    while pos < len(source):
+        line_end = source.find('\n', pos)
+        if line_end == -1:
+            line_end = len(source)
+        line = source[pos:line_end].lstrip()
+        if line and not line.startswith('#'):
+            break
+        pos = line_end + 1
+    else:
+        return ""
+
+    start = line_end - len(line)
+    # Allow string prefixes like r or u before the quotes
+    while start < len(source) and source[start] in 'rRuU':
+        start += 1
+    for quote in ('"""', "'''", '"', "'"):
+        if source.startswith(quote, start):
+            break
+    else:
+        return ""
+
+    body_start = start + len(quote)
+    body_end = source.find(quote, body_start)
+    doc = source[body_start:body_end if body_end != -1 else len(source)].strip()
+
+    summary_lines = []
+    for line in doc.split('\n'):
+        if line.strip() == '' or 'Params' in line:
+            break
+        summary_lines.append(line.strip())
+    return ' '.join(summary_lines)
+
+def file_summary(module_path: str) -> str:
+    """Summary of a tool file's docstring, read from its first few KiB."""
+    with open(module_path, 'rb') as f:
+        head = f.read(SUMMARY_READ_BYTES)
+    return docstring_summary(head.decode('utf-8', errors='replace'))
+
+def write_json(path: str, data: Any) -> Optional[int]:
+    """Atomically replace path with data as compact JSON.
+
+    Returns the new file's st_mtime_ns, or None if it couldn't be written.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()  # The last write sets the mtime
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+        os.replace(tmp_path, path)
+        return mtime
+    except OSError:
+        # Read-only directory: searches work without the saved file, just slower
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        return None
+
+def write_server_index(server_dir: str, entries: Iterable[Tuple[str, str]]) -> None:
+    """Save a server's (tool, summary) pairs to its SERVER_INDEX_FILE.
+
+    Each entry records its tool file's mtime and size, so an edited file's
+    summary is read from the file again instead of the index.
+    """
+    saved = []
+    for tool, summary in entries:
+        try:
+            st = os.stat(os.path.join(server_dir, f"{tool}.py"))
+        except OSError:
+            continue
+        saved.append([tool, summary, st.st_mtime_ns, st.st_size])
+    write_json(os.path.join(server_dir, SERVER_INDEX_FILE), saved)
+
+def read_server_index(server_dir: str) -> Optional[Tuple[int, Dict[str, List[Any]]]]:
+    """(file st_mtime_ns, tool -> [summary, mtime_ns, size]) from a server's
+    SERVER_INDEX_FILE, or None if it's missing or unusable."""
+    try:
+        with open(os.path.join(server_dir, SERVER_INDEX_FILE), "rb") as f:
+            index_mtime = os.fstat(f.fileno()).st_mtime_ns
+            return index_mtime, {tool: [summary, mtime_ns, size] for tool, summary, mtime_ns, size in json.loads(f.read())}
+    except (OSError, ValueError, TypeError):
+        return None
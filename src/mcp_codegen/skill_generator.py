@@ -4,9 +4,47 @@ This module generates skill files that help Claude Code discover and use
 generated MCP tools automatically.
 """
 from __future__ import annotations
+import hashlib
+import os
+import threading
+from itertools import islice
 from pathlib import Path
 from typing import List, Any
 
+from .codegen import _generate_tools_hash
+from .constants import __version__
+
+# Categories in priority order: a tool goes to the first category it matches
+_CATEGORY_ORDER = ("weather", "traffic", "camera", "road", "location", "data", "other")
+
+# Category keywords in priority order, as (token, category, name_only).
+# Name-only keywords are too common to match in free-text descriptions.
+_TOKENS = (
+    (b"weather", "weather", False),
+    (b"traffic", "traffic", False),
+    (b"camera", "camera", False),
+    (b"road", "road", False),
+    (b"location", "location", True),
+    (b"near", "location", True),
+    (b"geo", "location", True),
+    (b"get", "data", True),
+    (b"list", "data", True),
+    (b"search", "data", True),
+)
+
+# Trigger phrases used in the skill description, per category
+_CATEGORY_DESC = {
+    "weather": "weather forecasts and conditions",
+    "traffic": "traffic flow and incidents",
+    "camera": "traffic cameras and images",
+    "road": "road conditions and information",
+    "location": "location-based queries",
+    "data": "data retrieval and search"
+}
+
+# Skill directories already created by this process
+_created_dirs: set[Path] = set()
+
 
 def generate_skill(
     server_name: str,
@@ -25,59 +63,111 @@ def generate_skill(
     Returns:
         Path to the generated skill directory
     """
-    # Create skill directory
     skill_dir = Path(output_dir) / f"mcp-{server_name}"
-    skill_dir.mkdir(parents=True, exist_ok=True)
+
+    # Skip rendering and writing if the existing skill was built from the same inputs
+    hash_marker = _skill_hash_marker(server_name, server_url, tools)
+    try:
+        if (skill_dir / "SKILL.md").read_bytes().endswith(hash_marker.encode("utf-8")):
+            return str(skill_dir)
+    except FileNotFoundError:
+        pass
+
+    # Create skill directory
+    _ensure_dir(skill_dir)
 
     # Generate description based on tool names and descriptions
     tool_categories = _categorize_tools(tools)
     description = _generate_description(server_name, tool_categories)
 
     # Generate skill content
-    skill_content = _render_skill(server_name, server_url, tools, tool_categories)
+    skill_content = _render_skill(server_name, server_url, tools, tool_categories, description)
 
-    # Write SKILL.md
-    skill_file = skill_dir / "SKILL.md"
-    skill_file.write_text(skill_content, encoding="utf-8")
+    # Write SKILL.md, ending with the hash marker checked above
+    _write_skill_file(skill_dir, skill_content + hash_marker)
 
     return str(skill_dir)
 
 
+def _skill_hash_marker(server_name: str, server_url: str, tools: List[Any]) -> str:
+    """Build the trailing SKILL.md comment identifying the inputs it was rendered from.
+
+    The package version is included so upgrades re-render skills. The marker
+    goes at the end of the file because SKILL.md must start with frontmatter.
+    """
+    key = f"{__version__}\n{server_name}\n{server_url}\n{_generate_tools_hash(tools)}"
+    return f"\n<!-- tools-hash: {hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]} -->\n"
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create a directory once per process, skipping the mkdir on repeat calls."""
+    if path in _created_dirs:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    _created_dirs.add(path)
+
+
+def _write_skill_file(skill_dir: Path, content: str) -> None:
+    """Write SKILL.md, recreating the directory if it was removed since it was cached."""
+    skill_file = skill_dir / "SKILL.md"
+    data = content.encode("utf-8")
+    try:
+        _atomic_write(skill_file, data)
+    except FileNotFoundError:
+        _created_dirs.discard(skill_dir)
+        _ensure_dir(skill_dir)
+        _atomic_write(skill_file, data)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write data to path in one go, replacing any existing file atomically.
+
+    The bytes go straight to a temporary file descriptor (no TextIOWrapper or
+    BufferedWriter), which is then renamed over the target so readers never
+    see a half-written file. The temporary name is unique per thread, so
+    concurrent writers of one file never share it.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
 def _categorize_tools(tools: List[Any]) -> dict:
     """Categorize tools by common patterns in their names and descriptions.
 
     Returns:
-        Dictionary mapping category names to tool lists
+        Dictionary mapping category names to lists of (tool, description)
+        pairs, where description is normalized to a string
     """
-    categories = {
-        "weather": [],
-        "traffic": [],
-        "camera": [],
-        "road": [],
-        "location": [],
-        "data": [],
-        "other": []
-    }
+    categories: dict = {category: [] for category in _CATEGORY_ORDER}
 
     for tool in tools:
-        name = tool.name.lower()
-        desc = (getattr(tool, 'description', '') or '').lower()
-
-        # Categorize based on keywords
-        if "weather" in name or "weather" in desc:
-            categories["weather"].append(tool)
-        elif "traffic" in name or "traffic" in desc:
-            categories["traffic"].append(tool)
-        elif "camera" in name or "camera" in desc:
-            categories["camera"].append(tool)
-        elif "road" in name or "road" in desc:
-            categories["road"].append(tool)
-        elif "location" in name or "near" in name or "geo" in name:
-            categories["location"].append(tool)
-        elif "get" in name or "list" in name or "search" in name:
-            categories["data"].append(tool)
-        else:
-            categories["other"].append(tool)
+        desc = getattr(tool, 'description', '') or ''
+        # Lowercase name and description together; the name ends at the first newline
+        hay = f"{tool.name}\n{desc}".lower().encode("utf-8")
+        name_end = hay.index(b"\n")
+
+        category = "other"
+        for token, token_category, name_only in _TOKENS:
+            if hay.find(token, 0, name_end if name_only else len(hay)) != -1:
+                category = token_category
+                break
+        categories[category].append((tool, desc))
 
     # Remove empty categories
     return {k: v for k, v in categories.items() if v}
@@ -96,80 +186,39 @@ def _generate_description(server_name: str, tool_categories: dict) -> str:
     # Start with server name
     desc_parts = [f"Access {server_name.upper()} MCP server tools"]
 
-    # Add categories as trigger words
-    category_desc = {
-        "weather": "weather forecasts and conditions",
-        "traffic": "traffic flow and incidents",
-        "camera": "traffic cameras and images",
-        "road": "road conditions and information",
-        "location": "location-based queries",
-        "data": "data retrieval and search"
-    }
-
-    active_categories = []
-    for cat, tools in tool_categories.items():
-        if cat in category_desc:
-            active_categories.append(category_desc[cat])
+    # Trigger phrases for each category present
+    active_categories = [_CATEGORY_DESC[cat] for cat in tool_categories if cat in _CATEGORY_DESC]
 
+    # Add categories as trigger words
     if active_categories:
         desc_parts.append(f"for {', '.join(active_categories)}")
 
     # Add activation clause
     desc_parts.append(f". Activates when user mentions {server_name}")
 
-    # Add category keywords
-    keywords = list(tool_categories.keys())
-    if keywords:
-        desc_parts.append(f" or asks about {', '.join(keywords[:4])}")
+    # Add the first few category names as keywords
+    if tool_categories:
+        desc_parts.append(f" or asks about {', '.join(islice(tool_categories, 4))}")
 
     desc_parts.append(". Tools located in servers/ directory.")
 
     return "".join(desc_parts)[:1024]  # Limit to 1024 chars
 
 
-def _render_skill(
-    server_name: str,
-    server_url: str,
-    tools: List[Any],
-    tool_categories: dict
-) -> str:
-    """Render the complete SKILL.md content.
-
-    Args:
-        server_name: Name of the server
-        server_url: URL of the server
-        tools: List of all tools
-        tool_categories: Categorized tools
-
-    Returns:
-        Complete SKILL.md content as a string
-    """
-    description = _generate_description(server_name, tool_categories)
-
-    # Build tool list by category
-    tools_section = []
-    for category, category_tools in tool_categories.items():
-        tools_section.append(f"### {category.title()} Tools\n")
-        for tool in category_tools[:5]:  # Limit to 5 per category
-            desc = getattr(tool, 'description', '') or ''
-            tools_section.append(f"- `{tool.name}`: {desc[:100]}{'...' if len(desc) > 100 else ''}")
-        if len(category_tools) > 5:
-            tools_section.append(f"- ...and {len(category_tools) - 5} more {category} tools")
-        tools_section.append("")
-
-    tools_text = "\n".join(tools_section)
+def _short(text: str, limit: int = 100) -> str:
+    """Truncate text to limit characters, appending '...' if it was cut."""
+    return text if len(text) <= limit else f"{text[:limit]}..."
 
-    # Generate example tool name for documentation
-    example_tool = tools[0].name if tools else "example_tool"
 
-    content = f"""---
+# SKILL.md layout for a single server, filled in by _render_skill
+_SKILL_TEMPLATE = """---
 name: mcp-{server_name}
 description: {description}
 ---
 
-# {server_name.upper()} MCP Server Tools
+# {SERVER_NAME} MCP Server Tools
 
-This skill provides access to the {server_name.upper()} MCP server tools.
+This skill provides access to the {SERVER_NAME} MCP server tools.
 
 ## Server Information
 
@@ -251,7 +300,48 @@ All tools are located in `servers/{server_name}/`:
 - Tools are browsable and have inline documentation
 """
 
-    return content
+
+def _render_skill(
+    server_name: str,
+    server_url: str,
+    tools: List[Any],
+    tool_categories: dict,
+    description: str
+) -> str:
+    """Render the complete SKILL.md content.
+
+    Args:
+        server_name: Name of the server
+        server_url: URL of the server
+        tools: List of all tools
+        tool_categories: Categorized (tool, description) pairs
+        description: Skill description from _generate_description
+
+    Returns:
+        Complete SKILL.md content as a string
+    """
+    # Generate example tool name for documentation
+    example_tool = tools[0].name if tools else "example_tool"
+
+    # Tool list by category, with a blank line between category blocks
+    parts: List[str] = []
+    for category, category_tools in tool_categories.items():
+        if parts:
+            parts.append("\n")
+        parts.append(f"### {category.title()} Tools\n\n")
+        for tool, desc in category_tools[:5]:  # Limit to 5 per category
+            parts.append(f"- `{tool.name}`: {_short(desc)}\n")
+        if len(category_tools) > 5:
+            parts.append(f"- ...and {len(category_tools) - 5} more {category} tools\n")
+
+    return _SKILL_TEMPLATE.format_map({
+        "server_name": server_name,
+        "SERVER_NAME": server_name.upper(),
+        "server_url": server_url,
+        "description": description,
+        "tools_text": "".join(parts),
+        "example_tool": example_tool,
+    })
 
 
 def generate_multi_server_skill(
@@ -268,7 +358,7 @@ def generate_multi_server_skill(
         Path to the generated skill directory
     """
     skill_dir = Path(output_dir) / "mcp-tools"
-    skill_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(skill_dir)
 
     # Collect all tool categories across servers
     all_categories = set()
@@ -276,20 +366,19 @@ def generate_multi_server_skill(
 
     for server_name, server_url, tools in servers:
         categories = _categorize_tools(tools)
-        all_categories.update(categories.keys())
-        tool_count = len(tools)
+        all_categories.update(categories)
+        # List each server's categories so the summary says what it covers
+        category_text = f": {', '.join(categories)}" if categories else ""
         server_summaries.append(
-            f"- **{server_name}** ({tool_count} tools): {server_url}"
+            f"- **{server_name}** ({len(tools)} tools{category_text}): {server_url}"
         )
 
     # Build description
     category_list = ", ".join(sorted(all_categories)[:6])
     description = f"Access multiple MCP servers for {category_list}. Activates when user asks about these topics or mentions server names. Tools in servers/ directory."
 
-    # Build content
-    servers_list = "\n".join(server_summaries)
-
-    content = f"""---
+    # Build content from fragments joined once at the end
+    parts: List[str] = [f"""---
 name: mcp-tools
 description: {description[:1024]}
 ---
@@ -300,7 +389,14 @@ This skill provides unified access to multiple MCP servers.
 
 ## Available Servers
 
-{servers_list}
+"""]
+
+    for i, summary in enumerate(server_summaries):
+        if i:
+            parts.append("\n")
+        parts.append(summary)
+
+    parts.append(f"""
 
 ## Quick Usage
 
@@ -347,9 +443,8 @@ result2 = await call2(URL2, P2(...))
 5. Present results
 
 All tools are async, type-safe, and standalone.
-"""
+""")
 
-    skill_file = skill_dir / "SKILL.md"
-    skill_file.write_text(content, encoding="utf-8")
+    _write_skill_file(skill_dir, "".join(parts))
 
     return str(skill_dir)
@@ -1,7 +1,25 @@
 """Shared utility functions for mcp-codegen."""
 from __future__ import annotations
+import contextlib
+import functools
 import json
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, Union
+
+import httpx
+
+# orjson parses bytes directly (even a memoryview, without copying) and is
+# much faster; fall back to stdlib json, which needs real bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_loads(data: Union[bytes, bytearray, memoryview]) -> Any:
+        return json.loads(bytes(data))
+
+# Accept header value sent when the caller's value is missing or incomplete
+_ACCEPT_VALUE = "application/json, text/event-stream"
+_REQUIRED_ACCEPT_TYPES = frozenset({"application/json", "text/event-stream"})
+_DEFAULT_ACCEPT = {"Accept": _ACCEPT_VALUE}
 
 
 async def read_first_sse_event(response) -> dict:
@@ -13,19 +31,31 @@ async def read_first_sse_event(response) -> dict:
     Returns:
         Parsed JSON data from first SSE event, or empty dict if none found
     """
-    buffer = ""
+    buffer = bytearray()
     async for chunk in response.aiter_bytes():
-        buffer += chunk.decode('utf-8')
+        # Only scan the new bytes (plus one, for a separator split across chunks)
+        start = max(len(buffer) - 1, 0)
+        buffer += chunk
         # SSE events are separated by double newlines
-        if '\n\n' in buffer:
-            # Extract first event
-            event = buffer.split('\n\n')[0]
-            # Parse the event
-            for line in event.split('\n'):
-                if line.startswith('data: '):
-                    data_str = line[6:]  # Remove 'data: ' prefix
-                    return json.loads(data_str)
-            break
+        end = buffer.find(b'\n\n', start)
+        if end != -1:
+            # Locate the data line inside the first event without splitting it
+            if buffer.startswith(b'data:'):
+                line_start = 0
+            else:
+                line_start = buffer.find(b'\ndata:', 0, end)
+                if line_start == -1:
+                    break
+                line_start += 1
+            line_end = buffer.find(b'\n', line_start, end)
+            if line_end == -1:
+                line_end = end
+            # Parse the field value in place (the space after "data:" is optional)
+            with memoryview(buffer) as view:
+                value = view[line_start + 5:line_end]
+                if value[:1] == b' ':
+                    value = value[1:]
+                return _json_loads(value)
     return {}
 
 
@@ -39,13 +69,44 @@ def ensure_accept_headers(headers: Dict[str, str] | None = None) -> Dict[str, st
         headers: Existing headers dict or None
 
     Returns:
-        Headers dict with proper Accept header
+        Headers dict with proper Accept header (a new dict on every call)
     """
-    merged = dict(headers or {})
-    accept_values = [v.strip().lower() for v in merged.get("Accept", "").split(",") if v.strip()]
+    if not headers:
+        return _DEFAULT_ACCEPT.copy()
+    existing = headers.get("Accept")
+    if existing is None:
+        return {**headers, **_DEFAULT_ACCEPT}
+    return {**headers, "Accept": _accept_value(existing)}
 
-    # Ensure both required types are present
-    if "application/json" not in accept_values or "text/event-stream" not in accept_values:
-        merged["Accept"] = "application/json, text/event-stream"
 
-    return merged
+@functools.lru_cache(maxsize=128)
+def _accept_value(existing: str) -> str:
+    """The caller's Accept value if it has both required types, else ours.
+
+    Cached per value: clients reuse the same header template for every
+    request, so checking it costs a cache lookup.
+    """
+    if existing == _ACCEPT_VALUE or _REQUIRED_ACCEPT_TYPES.issubset(
+        {v.strip().lower() for v in existing.split(",")}
+    ):
+        return existing
+    return _ACCEPT_VALUE
+
+
+@contextlib.asynccontextmanager
+async def use_client(client: httpx.AsyncClient | None, timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the caller's client, or a new one that is closed on exit.
+
+    Lets callers share one connection pool across many requests. A shared
+    client is left open, so request-specific headers and timeouts must be
+    passed per request rather than set on the client.
+
+    Args:
+        client: Existing client to reuse, or None to create one
+        timeout: Timeout for a newly created client
+    """
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=timeout) as new_client:
+        yield new_client
@@ -1,14 +1,31 @@
 """Pytest configuration for mcp-codegen tests."""
+import ast
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import json
+import os
 import sys
 import tempfile
+import uuid
 from pathlib import Path
 
+import httpx
 import pytest
+import pytest_asyncio
+import respx
 
 # Add src directory to path so we can import mcp_codegen
 src_dir = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_dir))
 
+from mcp_codegen.codegen import fetch_schema, _tools_from_dicts
+from mcp_codegen.constants import MCP_PROTOCOL_VERSION
+
+# Synthetic MCP server responses, one hand-written JSON file per server
+REPLAY_DIR = Path(__file__).parent / "fixtures" / "mcp"
+
 
 # ============================================================================
 # Shared Fixtures for Integration Tests
@@ -45,6 +62,245 @@ def temp_workspace_dir():
         yield Path(tmpdir)
 
 
+@pytest.fixture
+def path_sandbox():
+    """Make generated code importable for the duration of a test.
+
+    Yields a function that prepends a directory to sys.path. On teardown the
+    directories are removed from sys.path and modules imported from them
+    (e.g. the generated ``servers`` package) are dropped from sys.modules.
+    Only modules added since the fixture started are checked.
+    """
+    modules_before = set(sys.modules)
+    roots: list[str] = []
+
+    def add(path):
+        root = str(path)
+        sys.path.insert(0, root)
+        roots.append(root)
+        return path
+
+    yield add
+
+    for root in roots:
+        sys.path.remove(root)
+    prefixes = tuple(os.path.join(root, "") for root in roots)
+    for name in sys.modules.keys() - modules_before:
+        module = sys.modules[name]
+        locations = [getattr(module, "__file__", None) or "", *getattr(module, "__path__", [])]
+        if any(loc.startswith(prefixes) for loc in locations):
+            del sys.modules[name]
+
+
+@pytest.fixture(scope="session")
+def class_names():
+    """Function returning the names of all classes defined in generated source, from one AST parse."""
+    def names(code):
+        return {node.name for node in ast.walk(ast.parse(code)) if isinstance(node, ast.ClassDef)}
+
+    return names
+
+
+@pytest.fixture(scope="session")
+def load_generated():
+    """Import a generated single-file module without touching sys.path.
+
+    Yields a function taking the module's file path. Each call loads it under
+    a unique name (e.g. ``weather_tools_<hex>``), so tests never collide in
+    sys.modules, even under xdist. The modules are dropped on teardown.
+    """
+    names: list[str] = []
+
+    def load(path):
+        path = Path(path)
+        name = f"{path.stem}_{uuid.uuid4().hex}"
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered before exec so Pydantic can resolve the module's annotations
+        sys.modules[name] = module
+        names.append(name)
+        spec.loader.exec_module(module)
+        return module
+
+    yield load
+
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+# ============================================================================
+# Hermetic MCP Replay
+# ============================================================================
+
+@functools.lru_cache(maxsize=None)
+def _replay_servers():
+    """Load the synthetic server fixtures from tests/fixtures/mcp.
+
+    They are written by hand to mirror each server's tools and transport,
+    not recorded from the live servers; --live checks them against reality.
+    """
+    return tuple(
+        json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(REPLAY_DIR.glob("*.json"))
+    )
+
+
+def _replay_rpc(server, request):
+    """Answer a JSON-RPC POST from a server's fixture.
+
+    Servers with transport "streamable-http" answer requests as a single
+    text/event-stream event and hand out a session ID on initialize.
+    Notifications get 202 with no body.
+    """
+    body = json.loads(request.content)
+    if "id" not in body:
+        return httpx.Response(202)
+    method = body.get("method")
+    message = {"jsonrpc": "2.0", "id": body["id"]}
+    if method == "initialize":
+        message["result"] = {
+            "protocolVersion": body.get("params", {}).get("protocolVersion", MCP_PROTOCOL_VERSION),
+            "capabilities": {"tools": {}},
+            "serverInfo": server["serverInfo"],
+        }
+    elif method == "tools/list":
+        message["result"] = {"tools": server["tools"]}
+    elif method == "tools/call" and body["params"]["name"] in server["calls"]:
+        message["result"] = server["calls"][body["params"]["name"]]
+    else:
+        message["error"] = {"code": -32601, "message": f"No fixture response for {method}"}
+    if server.get("transport") != "streamable-http":
+        return httpx.Response(200, json=message)
+    headers = {"content-type": "text/event-stream"}
+    if method == "initialize":
+        headers["mcp-session-id"] = uuid.uuid4().hex
+    return httpx.Response(200, headers=headers, text=f"event: message\ndata: {json.dumps(message)}\n\n")
+
+
+@pytest.fixture(scope="session")
+def replay_fixture():
+    """Find the synthetic fixture serving a server URL.
+
+    Returns a function taking the URL (with or without /mcp) and returning
+    the fixture file's path and parsed data.
+    """
+    def find(url):
+        key = url.rstrip("/").removesuffix("/mcp")
+        for path in sorted(REPLAY_DIR.glob("*.json")):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data["url"].rstrip("/").removesuffix("/mcp") == key:
+                return path, data
+        raise LookupError(f"No fixture in {REPLAY_DIR} serves {url}")
+
+    return find
+
+
+_replay_active = False
+
+
+@contextlib.contextmanager
+def mcp_replay():
+    """Serve the synthetic MCP servers from tests/fixtures/mcp for the block.
+
+    Plain http-post servers get 405 on HEAD, so transport detection settles
+    on http-post. Streamable-http servers answer HEAD with text/event-stream
+    and POSTs over SSE, and accept the session DELETE; their standalone GET
+    stream gets 405, as servers without one answer. Any other request fails
+    as if the host were unreachable. Re-entering an active replay is a no-op.
+    """
+    global _replay_active
+    if _replay_active:
+        yield
+        return
+    with respx.mock(assert_all_called=False) as router:
+        for server in _replay_servers():
+            if server.get("transport") == "streamable-http":
+                router.head(server["url"]).respond(200, headers={"content-type": "text/event-stream"})
+                router.get(server["url"]).respond(405)
+                router.delete(server["url"]).respond(200)
+            else:
+                router.head(server["url"]).respond(405)
+            router.post(server["url"]).mock(side_effect=functools.partial(_replay_rpc, server))
+        router.route().mock(side_effect=httpx.ConnectError)
+        _replay_active = True
+        try:
+            yield
+        finally:
+            _replay_active = False
+
+
+@pytest.fixture(autouse=True)
+def mocked_network(request):
+    """Replay the synthetic MCP fixtures for tests marked mcp_replay, unless --live."""
+    if request.config.getoption("--live") or request.node.get_closest_marker("mcp_replay") is None:
+        yield
+        return
+    with mcp_replay():
+        yield
+
+
+def _tool_to_dict(tool):
+    """Serialize a fetched tool to its tools/list JSON shape."""
+    input_schema = getattr(tool, "inputSchema", None)
+    if input_schema is None:
+        schema = tool.input_schema
+        input_schema = {
+            "type": schema.type,
+            "properties": schema.properties,
+            "required": schema.required,
+        }
+    return {
+        "name": tool.name,
+        "description": getattr(tool, "description", "") or "",
+        "inputSchema": input_schema,
+    }
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def http_client():
+    """Share one httpx connection pool across the integration session.
+
+    Pass it as client= to fetch_schema and _call so each server's TCP and
+    TLS setup happens once. Tests using it must run on the session loop
+    (pytest.mark.asyncio(loop_scope="session")).
+    """
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def fetch_schema_cached(request, http_client):
+    """Fetch a server's tool schema, reusing the copy in pytest's cache.
+
+    Returns an async function taking the server URL. Without --live the
+    schema comes from the synthetic fixtures (see mcp_replay). With --live,
+    schemas are stored in .pytest_cache keyed by URL, so reruns don't hit
+    the network; add --refresh-schemas to fetch fresh ones. Cached schemas
+    are rebuilt as new objects on every call, so tests can't mutate each
+    other's copy.
+    """
+    cache = request.config.cache
+    live = request.config.getoption("--live")
+    refresh = request.config.getoption("--refresh-schemas")
+
+    async def fetch(url):
+        if not live:
+            # Session fixtures are set up before mocked_network, so replay here too
+            with mcp_replay():
+                return await fetch_schema(url, client=http_client)
+        key = f"mcp/schema/{hashlib.sha1(url.encode()).hexdigest()}"
+        if not refresh:
+            cached = cache.get(key, None)
+            if cached is not None:
+                return _tools_from_dicts(cached)
+        tools = await fetch_schema(url, client=http_client)
+        cache.set(key, [_tool_to_dict(t) for t in tools])
+        return tools
+
+    return fetch
+
+
 # ============================================================================
 # Test Markers
 # ============================================================================
@@ -59,12 +315,47 @@ def pytest_configure(config):
         "markers",
         "unit: mark test as a unit test with no external dependencies"
     )
+    config.addinivalue_line(
+        "markers",
+        "mcp_replay: serve synthetic MCP server responses (tests/fixtures/mcp) unless --live"
+    )
+    config.addinivalue_line(
+        "markers",
+        "mcp_step(step): per-server ls/gen/call step, reported in the MCP server summary"
+    )
+    # Registered here too so the marker is known when pytest-xdist isn't installed
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): run tests with the same group name on one xdist worker"
+    )
 
 
 # ============================================================================
 # Pytest Options
 # ============================================================================
 
+def pytest_addoption(parser):
+    """Register command line options."""
+    parser.addoption(
+        "--refresh-schemas",
+        action="store_true",
+        default=False,
+        help="Refetch MCP server schemas instead of using the copies in .pytest_cache",
+    )
+    parser.addoption(
+        "--live",
+        action="store_true",
+        default=False,
+        help="Run mcp_replay integration tests against the real MCP servers",
+    )
+    parser.addoption(
+        "--record-fixtures",
+        action="store_true",
+        default=False,
+        help="With --live, overwrite the tools in tests/fixtures/mcp with each server's tools/list",
+    )
+
+
 def pytest_collection_modifyitems(config, items):
     """Automatically mark integration tests.
 
@@ -72,3 +363,55 @@ def pytest_collection_modifyitems(config, items):
     will be collected and can be filtered with -m integration.
     """
     # This is handled by explicit markers in test files
+
+    # Tag mcp_step tests with their server and step. user_properties travel
+    # with the test reports, so the summary also works under pytest-xdist
+    for item in items:
+        marker = item.get_closest_marker("mcp_step")
+        if marker is not None:
+            item.user_properties.append(("mcp_step", (item.callspec.params["server_name"], marker.args[0])))
+
+
+# ============================================================================
+# MCP Server Summary
+# ============================================================================
+
+# Outcome ("passed", "failed" or "skipped") per (server, step) of the mcp_step tests
+_mcp_steps: dict[tuple[str, str], str] = {}
+
+
+def pytest_runtest_logreport(report):
+    """Record each mcp_step test's outcome from its setup, call and teardown reports."""
+    for name, value in report.user_properties:
+        if name != "mcp_step":
+            continue
+        key = tuple(value)
+        if report.failed:
+            _mcp_steps[key] = "failed"
+        elif report.skipped:
+            _mcp_steps.setdefault(key, "skipped")
+        elif report.when == "call":
+            _mcp_steps.setdefault(key, "passed")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Fail the run if any server step failed."""
+    if "failed" in _mcp_steps.values() and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Print which ls/gen/call steps passed per server, after all tests ran."""
+    if not _mcp_steps:
+        return
+    servers: dict[str, dict[str, str]] = {}
+    for (server, step), outcome in _mcp_steps.items():
+        servers.setdefault(server, {})[step] = outcome
+
+    marks = {"passed": "✓", "failed": "✗", "skipped": "-"}
+    terminalreporter.section("MCP server summary")
+    for server, steps in servers.items():
+        terminalreporter.line(f"{server}: " + ", ".join(f"{marks[outcome]} {step}" for step, outcome in sorted(steps.items())))
+    failures = [server for server, steps in servers.items() if "failed" in steps.values()]
+    if failures:
+        terminalreporter.line(f"Servers with failing steps: {failures}", red=True)
@@ -3,23 +3,30 @@
 Tests complete workflows from generation through usage.
 """
 import asyncio
+import contextlib
 import json
+import os
+import runpy
 import sys
 import tempfile
-import shutil
 import subprocess
 from pathlib import Path
 from io import StringIO
 
+import httpx
 import pytest
 import pytest_asyncio
 
-from mcp_codegen.codegen import fetch_schema, render_module, generate_fs_layout_wrapper
+from mcp_codegen.codegen import render_module, generate_fs_layout_wrapper
 
 
 # Test server configuration
 TEST_SERVER_URL = "https://smhi-mcp.hakan-3a6.workers.dev"
 
+# Run every test on the session event loop shared with the session fixtures,
+# against the synthetic server fixtures unless --live is given
+pytestmark = [pytest.mark.asyncio(loop_scope="session"), pytest.mark.mcp_replay]
+
 
 @pytest.fixture
 def temp_project_dir():
@@ -28,15 +35,23 @@ def temp_project_dir():
         yield Path(tmpdir)
 
 
-@pytest_asyncio.fixture
-async def schema():
-    """Fetch schema from test server."""
-    return await fetch_schema(TEST_SERVER_URL)
+@pytest_asyncio.fixture(scope="session")
+async def schema(fetch_schema_cached):
+    """Fetch schema from test server once per test session.
+
+    The schema is cached between runs (see fetch_schema_cached). If the
+    server is unreachable, every test using the schema is skipped instead
+    of each one failing on its own connection attempt.
+    """
+    try:
+        return await fetch_schema_cached(TEST_SERVER_URL)
+    except httpx.TransportError as e:
+        pytest.skip(f"Test server unreachable: {e}")
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_gen_then_import_and_call(temp_project_dir, schema):
+async def test_gen_then_import_and_call(temp_project_dir, schema, load_generated):
     """Test end-to-end: generate code, import it, and call a tool.
 
     Workflow:
@@ -52,34 +67,27 @@ async def test_gen_then_import_and_call(temp_project_dir, schema):
     assert module_path.exists(), "Generated module not created"
     assert module_path.stat().st_size > 0, "Generated module is empty"
 
-    # Step 2: Add to path and import
-    sys.path.insert(0, str(temp_project_dir))
-    try:
-        import weather_tools
-
-        # Step 3: Call tool
-        params = weather_tools.get_weather_forecast.Params(
-            lat=64.75,
-            lon=20.95,
-            limit=1
-        )
-        result = await weather_tools.get_weather_forecast.call(
-            TEST_SERVER_URL,
-            params
-        )
+    # Step 2: Import the generated file
+    weather_tools = load_generated(module_path)
 
-        # Step 4: Verify result
-        assert result is not None, "No result from tool call"
+    # Step 3: Call tool
+    params = weather_tools.get_weather_forecast.Params(
+        lat=64.75,
+        lon=20.95,
+        limit=1
+    )
+    result = await weather_tools.get_weather_forecast.call(
+        TEST_SERVER_URL,
+        params
+    )
 
-    finally:
-        sys.path.remove(str(temp_project_dir))
-        if "weather_tools" in sys.modules:
-            del sys.modules["weather_tools"]
+    # Step 4: Verify result
+    assert result is not None, "No result from tool call"
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_gen_fs_layout_then_import_and_call(temp_project_dir, schema):
+async def test_gen_fs_layout_then_import_and_call(temp_project_dir, schema, path_sandbox):
     """Test end-to-end: generate fs-layout, import from it, and call tools.
 
     Workflow:
@@ -87,63 +95,47 @@ async def test_gen_fs_layout_then_import_and_call(temp_project_dir, schema):
     2. from servers.weather.get_weather_forecast import call, Params
     3. result = await call(...)
     """
-    # Step 1: Generate fs-layout (simulating: mcp-codegen gen --fs-layout ...)
+    # Step 1: Generate fs-layout into servers/ (simulating: mcp-codegen gen --fs-layout ...)
+    servers_dir = temp_project_dir / "servers"
     generate_fs_layout_wrapper(
         TEST_SERVER_URL,
         "weather",
         schema,
-        str(temp_project_dir)
+        str(servers_dir)
     )
 
-    # Create servers directory structure for imports
-    servers_dir = temp_project_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_project_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
     assert servers_dir.exists(), "servers directory not created"
     assert (servers_dir / "weather").exists(), "weather directory not created"
     assert (servers_dir / "weather" / "__init__.py").exists(), "__init__.py not created"
-    assert (temp_project_dir / "weather" / "get_weather_forecast.py").exists(), "tool file not created"
+    assert (servers_dir / "weather" / "get_weather_forecast.py").exists(), "tool file not created"
 
     # Step 2: Add to path and import
-    sys.path.insert(0, str(temp_project_dir))
-    try:
-        from servers.weather.get_weather_forecast import call, Params
-
-        # Step 3: Call tool
-        params = Params(lat=64.75, lon=20.95, limit=1)
-        result = await call(TEST_SERVER_URL, params)
+    path_sandbox(temp_project_dir)
+    from servers.weather.get_weather_forecast import call, Params
 
-        # Step 4: Verify result
-        assert result is not None, "No result from tool call"
+    # Step 3: Call tool
+    params = Params(lat=64.75, lon=20.95, limit=1)
+    result = await call(TEST_SERVER_URL, params)
 
-    finally:
-        sys.path.remove(str(temp_project_dir))
-        modules_to_remove = [m for m in sys.modules if m.startswith("servers")]
-        for mod in modules_to_remove:
-            del sys.modules[mod]
+    # Step 4: Verify result
+    assert result is not None, "No result from tool call"
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_run_agent_with_tool_calls(temp_project_dir, schema):
+async def test_run_agent_with_tool_calls(temp_project_dir, schema, path_sandbox, pytestconfig):
     """Test: Create agent script and run it with mcp-codegen run.
 
     This tests the agent execution feature from Example #4 of README.
     """
-    # Step 1: Generate fs-layout for agent to use
+    # Step 1: Generate fs-layout into servers/ for agent to use
     generate_fs_layout_wrapper(
         TEST_SERVER_URL,
         "weather",
         schema,
-        str(temp_project_dir)
+        str(temp_project_dir / "servers")
     )
 
-    # Create servers directory structure
-    servers_dir = temp_project_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_project_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
     # Step 2: Create agent script
     agent_code = '''
 import asyncio
@@ -164,9 +156,13 @@ print(f"Result type: {type(result)}")
     agent_file.write_text(agent_code, encoding="utf-8")
 
     # Step 3: Add to path so imports work
-    sys.path.insert(0, str(temp_project_dir))
-    try:
-        # Execute the agent script
+    path_sandbox(temp_project_dir)
+
+    # Execute the agent script. Runs in-process by default; set
+    # MCP_CODEGEN_TEST_SUBPROCESS=1 to run it in a fresh interpreter instead.
+    if os.getenv("MCP_CODEGEN_TEST_SUBPROCESS") == "1":
+        if not pytestconfig.getoption("--live"):
+            pytest.skip("The subprocess agent can't use the synthetic server fixtures; run with --live")
         result = await asyncio.to_thread(
             lambda: subprocess.run(
                 [sys.executable, str(agent_file)],
@@ -175,21 +171,24 @@ print(f"Result type: {type(result)}")
                 cwd=str(temp_project_dir)
             )
         )
-
-        # Step 4: Verify execution
         assert result.returncode == 0, f"Agent failed: {result.stderr}"
-        assert "Agent executed successfully!" in result.stdout, "Agent output not found"
+        output = result.stdout
+    else:
+        def run_agent():
+            with contextlib.redirect_stdout(StringIO()) as buf:
+                runpy.run_path(str(agent_file), run_name="__main__")
+            return buf.getvalue()
 
-    finally:
-        sys.path.remove(str(temp_project_dir))
-        modules_to_remove = [m for m in sys.modules if m.startswith("servers")]
-        for mod in modules_to_remove:
-            del sys.modules[mod]
+        # The agent calls asyncio.run(), so it needs a thread without a running loop
+        output = await asyncio.to_thread(run_agent)
+
+    # Step 4: Verify execution
+    assert "Agent executed successfully!" in output, "Agent output not found"
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_call_subcommand_output(schema):
+async def test_call_subcommand_output(schema, http_client, capsys):
     """Test that mcp-codegen call produces valid JSON output.
 
     From README:
@@ -199,23 +198,14 @@ async def test_call_subcommand_output(schema):
     # Import the _call function from CLI module
     from mcp_codegen.cli import _call
 
-    # Capture output
-    old_stdout = sys.stdout
-    sys.stdout = captured_output = StringIO()
-
-    try:
-        # Call the tool (simulating: mcp-codegen call ...)
-        await _call(
-            TEST_SERVER_URL,
-            "get_weather_forecast",
-            ["lat=64.75", "lon=20.95", "limit=1"]
-        )
-
-        # Get output
-        output = captured_output.getvalue()
-
-    finally:
-        sys.stdout = old_stdout
+    # Call the tool (simulating: mcp-codegen call ...)
+    await _call(
+        TEST_SERVER_URL,
+        "get_weather_forecast",
+        ["lat=64.75", "lon=20.95", "limit=1"],
+        client=http_client
+    )
+    output = capsys.readouterr().out
 
     # Verify output is valid JSON
     assert len(output) > 0, "No output from call command"
@@ -231,7 +221,7 @@ async def test_call_subcommand_output(schema):
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_generated_module_params_validation(temp_project_dir, schema):
+async def test_generated_module_params_validation(temp_project_dir, schema, load_generated):
     """Test that generated Params classes validate inputs.
 
     Ensures type safety in generated code.
@@ -241,39 +231,32 @@ async def test_generated_module_params_validation(temp_project_dir, schema):
     module_path = temp_project_dir / "weather_tools.py"
     module_path.write_text(code, encoding="utf-8")
 
-    sys.path.insert(0, str(temp_project_dir))
-    try:
-        import weather_tools
+    weather_tools = load_generated(module_path)
 
-        # Test 1: Valid parameters
-        valid_params = weather_tools.get_weather_forecast.Params(
-            lat=64.75,
-            lon=20.95,
-            limit=1
-        )
-        assert valid_params is not None
-
-        # Test 2: Required parameters are enforced
-        with pytest.raises(Exception):  # Pydantic ValidationError
-            weather_tools.get_weather_forecast.Params(lat=64.75)  # Missing lon
+    # Test 1: Valid parameters
+    valid_params = weather_tools.get_weather_forecast.Params(
+        lat=64.75,
+        lon=20.95,
+        limit=1
+    )
+    assert valid_params is not None
 
-        # Test 3: Type validation
-        with pytest.raises(Exception):  # Pydantic ValidationError
-            weather_tools.get_weather_forecast.Params(
-                lat="not_a_number",
-                lon=20.95
-            )
+    # Test 2: Required parameters are enforced
+    with pytest.raises(Exception):  # Pydantic ValidationError
+        weather_tools.get_weather_forecast.Params(lat=64.75)  # Missing lon
 
-        # Test 4: Model serialization
-        serialized = valid_params.model_dump(mode="json", exclude_none=True)
-        assert isinstance(serialized, dict)
-        assert serialized["lat"] == 64.75
-        assert serialized["lon"] == 20.95
+    # Test 3: Type validation
+    with pytest.raises(Exception):  # Pydantic ValidationError
+        weather_tools.get_weather_forecast.Params(
+            lat="not_a_number",
+            lon=20.95
+        )
 
-    finally:
-        sys.path.remove(str(temp_project_dir))
-        if "weather_tools" in sys.modules:
-            del sys.modules["weather_tools"]
+    # Test 4: Model serialization
+    serialized = valid_params.model_dump(mode="json", exclude_none=True)
+    assert isinstance(serialized, dict)
+    assert serialized["lat"] == 64.75
+    assert serialized["lon"] == 20.95
 
 
 @pytest.mark.asyncio
@@ -1,6 +1,6 @@
 """Test Pydantic v2 code generation."""
 import pytest
-from mcp_codegen.codegen import _pydantic_model_for_params, _generate_tools_hash, render_module
+from mcp_codegen.codegen import _pydantic_model_for_params, _generate_tools_hash, _tools_from_dicts, render_module
 
 
 class MockTool:
@@ -91,6 +91,26 @@ def test_generate_tools_hash():
     assert hash1 != hash3
 
 
+def test_tools_from_dicts():
+    """Test JSON tool definitions become objects with an input_schema."""
+    tools = _tools_from_dicts([
+        {
+            "name": "get_forecast",
+            "description": "Get weather forecast",
+            "inputSchema": {"type": "object", "properties": {"city": {"type": "string"}}, "required": ["city"]}
+        },
+        {"name": "ping"}
+    ])
+
+    assert tools[0].name == "get_forecast"
+    assert tools[0].description == "Get weather forecast"
+    assert tools[0].input_schema.properties == {"city": {"type": "string"}}
+    assert tools[0].input_schema.required == ["city"]
+    assert tools[1].description == ""
+    assert tools[1].input_schema.properties == {}
+    assert tools[1].input_schema.type == "object"
+
+
 def test_empty_tools_raises_error():
     """Test rendering fails gracefully with no tools."""
     with pytest.raises(ValueError) as exc_info:
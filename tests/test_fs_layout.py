@@ -1,5 +1,6 @@
 """Test filesystem layout generation."""
-import tempfile
+import json
+import os
 from pathlib import Path
 import sys
 import pytest
@@ -8,6 +9,8 @@ import pytest
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from mcp_codegen.fs_layout import generate_fs_layout
+from mcp_codegen.codegen import generate_fs_layout_wrapper
+from mcp_codegen.runtime.tool_index import SERVER_INDEX_FILE
 
 class MockSchema:
     """Mock schema for testing."""
@@ -23,63 +26,105 @@ class MockTool:
         self.input_schema = input_schema
         self.protocol_version = "2025-06-18"
 
-def test_generate_fs_layout():
+def test_generate_fs_layout(tmp_path):
     """Test generating per-tool files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tools = [
-            MockTool("create_pr", "Create a PR", MockSchema({
-                "title": {"type": "string"},
-                "body": {"type": "string"}
-            }, ["title"]))
-        ]
-
-        generate_fs_layout(
-            base_url="http://example.com",
-            module_name="github",
-            tools=tools,
-            output_dir=tmpdir
-        )
-
-        # Check directory structure
-        github_dir = Path(tmpdir) / "github"
-        assert github_dir.exists()
-        assert (github_dir / "__init__.py").exists()
-        assert (github_dir / "create_pr.py").exists()
-
-        # Check __init__.py content
-        init_content = (github_dir / "__init__.py").read_text()
-        assert "github" in init_content
-        assert "create_pr" in init_content
-
-        # Check tool file content
-        tool_content = (github_dir / "create_pr.py").read_text()
-        assert "class Params" in tool_content
-        assert "async def call" in tool_content
-        assert "def call_sync" in tool_content
-
-def test_generate_multiple_tools():
+    tools = [
+        MockTool("create_pr", "Create a PR", MockSchema({
+            "title": {"type": "string"},
+            "body": {"type": "string"}
+        }, ["title"]))
+    ]
+
+    generate_fs_layout(
+        base_url="http://example.com",
+        module_name="github",
+        tools=tools,
+        output_dir=str(tmp_path)
+    )
+
+    # Check directory structure (one scandir instead of a stat per file)
+    github_dir = tmp_path / "github"
+    entries = {e.name for e in os.scandir(github_dir) if e.is_file()}
+    assert "__init__.py" in entries
+    assert "create_pr.py" in entries
+
+    # Check __init__.py content
+    init_content = (github_dir / "__init__.py").read_text(encoding="utf-8")
+    assert "github" in init_content
+    assert "create_pr" in init_content
+
+    # Check tool file content
+    tool_content = (github_dir / "create_pr.py").read_text(encoding="utf-8")
+    assert "class Params" in tool_content
+    assert "async def call" in tool_content
+    assert "def call_sync" in tool_content
+
+def test_generate_multiple_tools(tmp_path):
     """Test generating multiple tool files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tools = [
-            MockTool("tool1", "First tool", MockSchema({}, [])),
-            MockTool("tool2", "Second tool", MockSchema({}, [])),
-            MockTool("tool3", "Third tool", MockSchema({}, [])),
-        ]
-
-        generate_fs_layout(
-            base_url="http://example.com",
-            module_name="server",
-            tools=tools,
-            output_dir=tmpdir
-        )
-
-        server_dir = Path(tmpdir) / "server"
-        assert len(list(server_dir.glob("*.py"))) == 4  # 3 tools + __init__.py
-
-        # Check all tools are exported in __init__.py
-        init_content = (server_dir / "__init__.py").read_text()
-        for tool in tools:
-            assert tool.name in init_content
+    tools = [
+        MockTool("tool1", "First tool", MockSchema({}, [])),
+        MockTool("tool2", "Second tool", MockSchema({}, [])),
+        MockTool("tool3", "Third tool", MockSchema({}, [])),
+    ]
+
+    generate_fs_layout(
+        base_url="http://example.com",
+        module_name="server",
+        tools=tools,
+        output_dir=str(tmp_path)
+    )
+
+    server_dir = tmp_path / "server"
+    py_files = [e.name for e in os.scandir(server_dir) if e.name.endswith(".py")]
+    assert len(py_files) == 4  # 3 tools + __init__.py
+
+    # Check all tools are exported in __init__.py
+    init_content = (server_dir / "__init__.py").read_text(encoding="utf-8")
+    for tool in tools:
+        assert tool.name in init_content
+
+def test_generate_fs_layout_server_index(tmp_path):
+    """The server's .index.json holds each tool's docstring summary."""
+    tools = [MockTool("tool1", "First tool", MockSchema({}, []))]
+
+    generate_fs_layout("http://example.com", "server", tools, str(tmp_path))
+
+    index = json.loads((tmp_path / "server" / SERVER_INDEX_FILE).read_text(encoding="utf-8"))
+    st = (tmp_path / "server" / "tool1.py").stat()
+    assert index == [["tool1", "Tool: tool1", st.st_mtime_ns, st.st_size]]
+
+def test_generate_fs_layout_wrapper_subdir(tmp_path):
+    """subdir= writes the server package one level down, e.g. into servers/."""
+    tools = [MockTool("tool1", "First tool", MockSchema({}, []))]
+
+    generate_fs_layout_wrapper("http://example.com", "server", tools, str(tmp_path), subdir="servers")
+
+    assert (tmp_path / "servers" / "server" / "tool1.py").exists()
+    assert not (tmp_path / "server").exists()
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+def test_generated_call_sync_passes_headers(tmp_path):
+    """Test the generated call_sync runs call with the given headers."""
+    from mcp_codegen.runtime.search import ToolRef, _cleanup_loaded
+
+    tools = [MockTool("ping", "Ping", MockSchema())]
+    generate_fs_layout(base_url="http://example.com", module_name="pinger", tools=tools, output_dir=str(tmp_path))
+
+    try:
+        module = ToolRef("pinger", "ping", str(tmp_path / "pinger" / "ping.py")).load()
+        calls = []
+
+        async def fake_call(base_url, params, headers=None):
+            calls.append((base_url, headers))
+            return "pong"
+
+        module.call = fake_call
+        result = module.call_sync("http://example.com", module.Params(), headers={"X-Test": "1"})
+    finally:
+        _cleanup_loaded()
+
+    assert result == "pong"
+    assert calls == [("http://example.com", {"X-Test": "1"})]
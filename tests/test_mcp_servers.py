@@ -3,14 +3,13 @@
 Tests the ls, gen, and call commands against multiple public MCP servers
 to ensure compatibility with different transport protocols and server implementations.
 """
-import asyncio
 import json
-import os
-import tempfile
 import pytest
-from pathlib import Path
+import pytest_asyncio
 
-from mcp_codegen.codegen import fetch_schema, detect_transport
+from mcp_codegen.codegen import (
+    _fetch_http_post, _tools_from_dicts, clear_transport_cache, detect_transport, render_module,
+)
 from mcp_codegen.cli import _call
 
 
@@ -19,6 +18,7 @@ TEST_SERVERS = {
     "deepwiki": {
         "url": "https://mcp.deepwiki.com/mcp",
         "description": "SSE-based HTTP POST with session management",
+        "transport": "streamable-http",
         "expected_tools": ["read_wiki_structure", "read_wiki_contents", "ask_question"],
         "test_call": {
             "tool": "read_wiki_structure",
@@ -29,6 +29,7 @@ TEST_SERVERS = {
     "smhi": {
         "url": "https://smhi-mcp.hakan-3a6.workers.dev",
         "description": "Plain JSON HTTP POST",
+        "transport": "http-post",
         "expected_tools": ["get_weather_forecast", "list_snowmobile_conditions"],
         "test_call": {
             "tool": "get_weather_forecast",
@@ -39,6 +40,7 @@ TEST_SERVERS = {
     "exa": {
         "url": "https://mcp.exa.ai/mcp",
         "description": "Standard JSON HTTP POST",
+        "transport": "http-post",
         "expected_tools": ["web_search_exa", "get_code_context_exa"],
         "test_call": {
             "tool": "web_search_exa",
@@ -48,111 +50,160 @@ TEST_SERVERS = {
     }
 }
 
+# Pre-render each test call's arguments in key=value form, as passed to _call.
+# Non-string values are JSON-encoded
+for server in TEST_SERVERS.values():
+    server["test_call"]["args_list"] = [
+        f"{key}={value if isinstance(value, str) else json.dumps(value)}"
+        for key, value in server["test_call"]["args"]
+    ]
+
+# Server parameters grouped per server, so `pytest -n auto --dist=loadgroup`
+# keeps each server's tests on one worker (and its session fixtures)
+SERVER_PARAMS = [
+    pytest.param(name, marks=pytest.mark.xdist_group(f"mcp-{name}"))
+    for name in TEST_SERVERS
+]
+
+# Run every test on the session event loop shared with the session fixtures,
+# against the synthetic server fixtures unless --live is given
+pytestmark = [pytest.mark.asyncio(loop_scope="session"), pytest.mark.mcp_replay]
+
+
+@pytest.fixture(scope="class", params=SERVER_PARAMS)
+def server_name(request):
+    """Test server name, parametrized per class so tests are grouped by server."""
+    return request.param
+
+
+@pytest_asyncio.fixture(scope="class", loop_scope="session")
+async def tools(server_name, fetch_schema_cached):
+    """Fetch the server's tool schema once per server (cached across runs)."""
+    return await fetch_schema_cached(TEST_SERVERS[server_name]["url"])
+
+
+@pytest.mark.integration
+class TestMCPServer:
+    """ls, gen and call against each test server.
+
+    The class-scoped server_name parameter groups the tests by server, so
+    each server's schema is fetched once and shared by its tests. Each test
+    is marked with its step, and conftest reports the steps per server at
+    the end of the run.
+    """
+
+    @pytest.mark.mcp_step("ls")
+    async def test_ls(self, server_name, tools):
+        """Test fetching tool schema (ls command) from MCP server."""
+        server = TEST_SERVERS[server_name]
+
+        # Verify we got tools
+        assert len(tools) > 0, f"No tools returned from {server_name}"
+
+        # Verify expected tools are present
+        tool_names = [t.name for t in tools]
+        for expected_tool in server["expected_tools"]:
+            assert expected_tool in tool_names, \
+                f"Expected tool '{expected_tool}' not found in {server_name}. Got: {tool_names}"
+
+        print(f"✓ {server_name}: Found {len(tools)} tools")
+
+    @pytest.mark.mcp_step("gen")
+    async def test_gen(self, server_name, tools, class_names):
+        """Test generating Python stub module (gen command) from MCP server."""
+        server = TEST_SERVERS[server_name]
+
+        # Generate code
+        code = render_module(f"{server_name}_mcp", tools)
+
+        # Verify code was generated
+        assert len(code) > 0, f"No code generated for {server_name}"
+        assert "class" in code, f"No class definitions in generated code for {server_name}"
+        assert "__all__" in code, f"No __all__ export list in generated code for {server_name}"
+
+        # Verify expected tool classes are defined in the code
+        classes = class_names(code)
+        for expected_tool in server["expected_tools"]:
+            # Convert tool name to Python class name
+            class_name = expected_tool.replace('-', '_')
+            assert class_name in classes, \
+                f"Expected class '{class_name}' not found in generated code for {server_name}"
+
+        print(f"✓ {server_name}: Generated {len(code)} characters of code")
+
+    @pytest.mark.mcp_step("call")
+    async def test_call(self, server_name, http_client, capsys):
+        """Test calling a tool directly (call command) on MCP server."""
+        server = TEST_SERVERS[server_name]
+        test_call = server["test_call"]
+
+        # Call the tool, capturing its stdout output
+        await _call(server["url"], test_call["tool"], test_call["args_list"], client=http_client)
+        output = capsys.readouterr().out
+
+        # Verify we got output
+        assert len(output) > 0, f"No output from calling {test_call['tool']} on {server_name}"
+
+        # Verify expected content in response
+        assert test_call["expected_in_response"] in output, \
+            f"Expected '{test_call['expected_in_response']}' not found in response from {server_name}"
+
+        print(f"✓ {server_name}: Called {test_call['tool']} successfully")
+
+
+def _tool_shapes(tools_data):
+    """Map tool name to what the generators use of it: description and input schema."""
+    return {
+        t.name: {
+            "description": t.description,
+            "type": t.input_schema.type,
+            "properties": t.input_schema.properties,
+            "required": t.input_schema.required,
+        }
+        for t in _tools_from_dicts(tools_data)
+    }
 
-@pytest.mark.asyncio
-@pytest.mark.integration  # Add this marker
-@pytest.mark.parametrize("server_name", TEST_SERVERS.keys())
-async def test_fetch_schema(server_name):
-    """Test fetching tool schema (ls command) from MCP server."""
-    server = TEST_SERVERS[server_name]
-
-    # Fetch schema
-    tools = await fetch_schema(server["url"])
-
-    # Verify we got tools
-    assert len(tools) > 0, f"No tools returned from {server_name}"
-
-    # Verify expected tools are present
-    tool_names = [t.name for t in tools]
-    for expected_tool in server["expected_tools"]:
-        assert expected_tool in tool_names, \
-            f"Expected tool '{expected_tool}' not found in {server_name}. Got: {tool_names}"
-
-    print(f"✓ {server_name}: Found {len(tools)} tools")
 
+@pytest.mark.integration
+@pytest.mark.parametrize("server_name", SERVER_PARAMS)
+async def test_replay_fixture_matches_server(request, server_name, http_client, replay_fixture):
+    """Check the synthetic fixture's tools against the real server's (--live only).
 
-@pytest.mark.asyncio
-@pytest.mark.integration  # Add this marker
-@pytest.mark.parametrize("server_name", TEST_SERVERS.keys())
-async def test_generate_stub(server_name):
-    """Test generating Python stub module (gen command) from MCP server."""
+    Compares tool names, descriptions and input schemas. With
+    --record-fixtures the fixture's tools are replaced by the server's
+    tools/list response instead.
+    """
+    if not request.config.getoption("--live"):
+        pytest.skip("Compares the fixture with the real server; run with --live")
     server = TEST_SERVERS[server_name]
+    path, fixture = replay_fixture(server["url"])
+    live_tools = await _fetch_http_post(server["url"].removesuffix("/mcp"), client=http_client)
 
-    # Import render_module here to avoid circular imports
-    from mcp_codegen.codegen import render_module
-
-    # Fetch schema
-    tools = await fetch_schema(server["url"])
-
-    # Generate code
-    code = render_module(f"{server_name}_mcp", tools)
+    if request.config.getoption("--record-fixtures"):
+        fixture["tools"] = live_tools
+        path.write_text(json.dumps(fixture, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        return
 
-    # Verify code was generated
-    assert len(code) > 0, f"No code generated for {server_name}"
-    assert "class" in code, f"No class definitions in generated code for {server_name}"
-    assert "__all__" in code, f"No __all__ export list in generated code for {server_name}"
-
-    # Verify expected tool classes are in the code
-    for expected_tool in server["expected_tools"]:
-        # Convert tool name to Python class name
-        class_name = expected_tool.replace('-', '_')
-        assert class_name in code, \
-            f"Expected class '{class_name}' not found in generated code for {server_name}"
-
-    print(f"✓ {server_name}: Generated {len(code)} characters of code")
+    recorded, live = _tool_shapes(fixture["tools"]), _tool_shapes(live_tools)
+    assert sorted(recorded) == sorted(live), f"{path.name} tool names differ from {server_name}'s"
+    for name, shape in recorded.items():
+        assert shape == live[name], f"{path.name}: {name} differs from {server_name}'s; rerun with --record-fixtures"
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration  # Add this marker
-@pytest.mark.parametrize("server_name", TEST_SERVERS.keys())
-async def test_call_tool(server_name):
-    """Test calling a tool directly (call command) on MCP server."""
-    server = TEST_SERVERS[server_name]
-    test_call = server["test_call"]
-
-    # Prepare arguments in key=value format
-    args_list = []
-    for key, value in test_call["args"]:
-        if isinstance(value, str):
-            args_list.append(f"{key}={value}")
-        else:
-            # Convert to JSON for non-string values
-            args_list.append(f"{key}={json.dumps(value)}")
+@pytest.mark.parametrize("server_name", SERVER_PARAMS)
+async def test_transport_detection(request, server_name):
+    """Test that transport detection correctly identifies server protocol.
 
-    # Capture output by redirecting to a StringIO-like object
-    import sys
-    from io import StringIO
-    old_stdout = sys.stdout
-    sys.stdout = captured_output = StringIO()
-
-    try:
-        # Call the tool
-        await _call(server["url"], test_call["tool"], args_list)
-
-        # Get the output
-        output = captured_output.getvalue()
-    finally:
-        sys.stdout = old_stdout
-
-    # Verify we got output
-    assert len(output) > 0, f"No output from calling {test_call['tool']} on {server_name}"
-
-    # Verify expected content in response
-    assert test_call["expected_in_response"] in output, \
-        f"Expected '{test_call['expected_in_response']}' not found in response from {server_name}"
-
-    print(f"✓ {server_name}: Called {test_call['tool']} successfully")
-
-
-@pytest.mark.asyncio
-@pytest.mark.integration  # Add this marker
-@pytest.mark.parametrize("server_name", TEST_SERVERS.keys())
-async def test_transport_detection(server_name):
-    """Test that transport detection correctly identifies server protocol."""
+    The synthetic fixtures serve each server over its listed transport, so
+    without --live the detected transport must match it exactly.
+    """
     server = TEST_SERVERS[server_name]
+    clear_transport_cache()
 
     # Extract base URL (remove /mcp suffix if present)
-    base_url = server["url"].rstrip('/mcp').rstrip('/')
+    base_url = server["url"].removesuffix('/mcp').rstrip('/')
 
     # Detect transport
     transport = detect_transport(base_url)
@@ -163,67 +214,12 @@ async def test_transport_detection(server_name):
 
     # For known servers, we expect specific transports
     # (This can be updated as we learn more about each server)
+    if not request.config.getoption("--live"):
+        assert transport == server["transport"], \
+            f"Replayed {server_name} detected as {transport}, expected {server['transport']}"
     print(f"✓ {server_name}: Detected transport '{transport}'")
 
 
-@pytest.mark.asyncio
-@pytest.mark.integration  # Add this marker
-async def test_all_servers_sequential():
-    """Test all servers sequentially to ensure no interference between tests."""
-    results = {}
-
-    for server_name, server in TEST_SERVERS.items():
-        try:
-            # Test ls
-            tools = await fetch_schema(server["url"])
-            results[f"{server_name}_ls"] = f"✓ {len(tools)} tools"
-
-            # Test gen
-            from mcp_codegen.codegen import render_module
-            code = render_module(f"{server_name}_mcp", tools)
-            results[f"{server_name}_gen"] = f"✓ {len(code)} chars"
-
-            # Test call
-            test_call = server["test_call"]
-            args_list = []
-            for key, value in test_call["args"]:
-                if isinstance(value, str):
-                    args_list.append(f"{key}={value}")
-                else:
-                    args_list.append(f"{key}={json.dumps(value)}")
-
-            import sys
-            from io import StringIO
-            old_stdout = sys.stdout
-            sys.stdout = captured_output = StringIO()
-            try:
-                await _call(server["url"], test_call["tool"], args_list)
-                output = captured_output.getvalue()
-            finally:
-                sys.stdout = old_stdout
-
-            results[f"{server_name}_call"] = f"✓ {len(output)} chars output"
-
-        except Exception as e:
-            results[f"{server_name}"] = f"✗ {str(e)}"
-
-    # Print summary
-    print("\n=== Test Summary ===")
-    for key, value in results.items():
-        print(f"{key}: {value}")
-
-    # Check for failures
-    failures = [k for k, v in results.items() if v.startswith("✗")]
-    assert len(failures) == 0, f"Tests failed: {failures}"
-
-
 if __name__ == "__main__":
     # Allow running tests directly
-    import sys
-
-    print("Running MCP server integration tests...\n")
-
-    # Run all servers test
-    asyncio.run(test_all_servers_sequential())
-
-    print("\n✓ All tests passed!")
+    pytest.main([__file__, "-v", "-m", "integration"])
@@ -4,36 +4,58 @@ Tests for search_tools and other runtime utilities documented in the README.
 """
 import sys
 import tempfile
-import shutil
 from pathlib import Path
 
 import pytest
 import pytest_asyncio
 
-from mcp_codegen.codegen import fetch_schema, generate_fs_layout_wrapper
+from mcp_codegen.codegen import generate_fs_layout_wrapper
 from mcp_codegen.runtime import search_tools
+from mcp_codegen.runtime.search import _cleanup_loaded
 
 
 # Test server configuration
 TEST_SERVER_URL = "https://smhi-mcp.hakan-3a6.workers.dev"
 
+# Run every test on the session event loop shared with the session fixtures,
+# against the synthetic server fixtures unless --live is given
+pytestmark = [pytest.mark.asyncio(loop_scope="session"), pytest.mark.mcp_replay]
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def temp_servers_dir():
-    """Create temporary directory for generated servers."""
+    """Create temporary directory for generated servers, shared by this module's tests."""
     with tempfile.TemporaryDirectory() as tmpdir:
         yield Path(tmpdir)
 
 
-@pytest_asyncio.fixture
-async def weather_schema():
-    """Fetch weather schema from test server."""
-    return await fetch_schema(TEST_SERVER_URL)
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def weather_schema(fetch_schema_cached):
+    """Fetch weather schema from test server once per test session (cached across runs)."""
+    return await fetch_schema_cached(TEST_SERVER_URL)
+
+
+@pytest.fixture(scope="module")
+def servers_dir(temp_servers_dir, weather_schema):
+    """Generate the weather server's filesystem layout once per test module.
+
+    Returns temp_servers_dir/servers, containing weather/. The tests only
+    read it (and import from it), so they can share one copy.
+    """
+    # Generate filesystem layout straight into servers/ (search needs this)
+    generate_fs_layout_wrapper(
+        TEST_SERVER_URL,
+        "weather",
+        weather_schema,
+        str(temp_servers_dir),
+        subdir="servers"
+    )
+    return temp_servers_dir / "servers"
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_search_tools_basic(temp_servers_dir, weather_schema):
+async def test_search_tools_basic(servers_dir):
     """Test Example #3: Basic tool search functionality.
 
     From README:
@@ -43,26 +65,13 @@ async def test_search_tools_basic(temp_servers_dir, weather_schema):
             print(f"{tool.server}/{tool.tool}")
             print(f"  {tool.summary}")
     """
-    # Step 1: Generate filesystem layout (search needs this)
-    generate_fs_layout_wrapper(
-        TEST_SERVER_URL,
-        "weather",
-        weather_schema,
-        str(temp_servers_dir)
-    )
-
-    # Create servers directory structure
-    servers_dir = temp_servers_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_servers_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
-    # Step 2: Search for tools
+    # Step 1: Search for tools
     tools = search_tools("weather", servers_dir=str(servers_dir))
 
-    # Step 3: Verify search results
+    # Step 2: Verify search results
     assert len(tools) > 0, "No tools found matching 'weather'"
 
-    # Step 4: Verify tool attributes
+    # Step 3: Verify tool attributes
     for tool in tools:
         assert hasattr(tool, "server"), "ToolRef missing 'server' attribute"
         assert hasattr(tool, "tool"), "ToolRef missing 'tool' attribute"
@@ -77,21 +86,8 @@ async def test_search_tools_basic(temp_servers_dir, weather_schema):
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_search_tools_specific_query(temp_servers_dir, weather_schema):
+async def test_search_tools_specific_query(servers_dir):
     """Test searching for specific tools by name."""
-    # Generate filesystem layout
-    generate_fs_layout_wrapper(
-        TEST_SERVER_URL,
-        "weather",
-        weather_schema,
-        str(temp_servers_dir)
-    )
-
-    # Create servers directory structure
-    servers_dir = temp_servers_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_servers_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
     # Search for specific tool
     tools = search_tools("forecast", servers_dir=str(servers_dir))
 
@@ -104,7 +100,7 @@ async def test_search_tools_specific_query(temp_servers_dir, weather_schema):
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_search_tools_load_method(temp_servers_dir, weather_schema):
+async def test_search_tools_load_method(servers_dir):
     """Test Example #3: ToolRef.load() method.
 
     From README:
@@ -113,21 +109,8 @@ async def test_search_tools_load_method(temp_servers_dir, weather_schema):
             module = tool.load()
             result = await module.call(base_url, module.Params(...))
     """
-    # Generate filesystem layout
-    generate_fs_layout_wrapper(
-        TEST_SERVER_URL,
-        "weather",
-        weather_schema,
-        str(temp_servers_dir)
-    )
-
-    # Create servers directory structure
-    servers_dir = temp_servers_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_servers_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
     # Add to sys.path so imports work
-    sys.path.insert(0, str(temp_servers_dir))
+    sys.path.insert(0, str(servers_dir.parent))
     try:
         # Search for tools
         tools = search_tools("weather", servers_dir=str(servers_dir))
@@ -150,30 +133,15 @@ async def test_search_tools_load_method(temp_servers_dir, weather_schema):
             assert result is not None, "Tool call returned None"
 
     finally:
-        sys.path.remove(str(temp_servers_dir))
-        # Clean up modules
-        modules_to_remove = [m for m in sys.modules if m.startswith("servers")]
-        for mod in modules_to_remove:
-            del sys.modules[mod]
+        sys.path.remove(str(servers_dir.parent))
+        # Clean up the modules load() registered
+        _cleanup_loaded()
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_search_tools_no_results(temp_servers_dir, weather_schema):
+async def test_search_tools_no_results(servers_dir):
     """Test search with query that returns no results."""
-    # Generate filesystem layout
-    generate_fs_layout_wrapper(
-        TEST_SERVER_URL,
-        "weather",
-        weather_schema,
-        str(temp_servers_dir)
-    )
-
-    # Create servers directory structure
-    servers_dir = temp_servers_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_servers_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
     # Search for something that doesn't exist
     tools = search_tools("nonexistent_tool", servers_dir=str(servers_dir))
 
@@ -184,24 +152,14 @@ async def test_search_tools_no_results(temp_servers_dir, weather_schema):
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_search_tools_multiple_servers(temp_servers_dir, weather_schema):
+async def test_search_tools_multiple_servers(request, servers_dir):
     """Test searching across multiple generated servers.
 
-    Simulates having multiple servers in servers/ directory.
+    Simulates having multiple servers in servers/ directory. Needs the real
+    server's tool list: the synthetic smhi fixture has no temperature tool.
     """
-    # Generate first server
-    generate_fs_layout_wrapper(
-        TEST_SERVER_URL,
-        "weather",
-        weather_schema,
-        str(temp_servers_dir)
-    )
-
-    # Create servers directory structure
-    servers_dir = temp_servers_dir / "servers"
-    servers_dir.mkdir(exist_ok=True)
-    shutil.copytree(temp_servers_dir / "weather", servers_dir / "weather", dirs_exist_ok=True)
-
+    if not request.config.getoption("--live"):
+        pytest.skip("The synthetic smhi fixture has no temperature tool; run with --live")
     # Search across all servers
     tools = search_tools("temperature", servers_dir=str(servers_dir))
 
@@ -213,7 +171,7 @@ async def test_search_tools_multiple_servers(temp_servers_dir, weather_schema):
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_client_import_from_runtime(temp_servers_dir, weather_schema):
+async def test_client_import_from_runtime():
     """Test that Client can be imported from mcp_codegen.runtime.
 
     This is used by generated fs-layout code:
@@ -229,7 +187,7 @@ async def test_client_import_from_runtime(temp_servers_dir, weather_schema):
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_client_direct_import(temp_servers_dir, weather_schema):
+async def test_client_direct_import():
     """Test that Client can be imported directly from runtime.client.
 
     This is what the fs-layout generated code uses:
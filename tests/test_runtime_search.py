@@ -1,4 +1,6 @@
 """Test runtime search functionality."""
+import json
+import os
 import tempfile
 from pathlib import Path
 import sys
@@ -7,7 +9,9 @@ import pytest
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from mcp_codegen.runtime.search import search_tools, list_servers, list_tools, ToolRef
+from mcp_codegen.runtime import search
+from mcp_codegen.runtime.search import search_tools, list_servers, list_tools, ToolRef, INDEX_FILE, build_search_index, _cleanup_loaded
+from mcp_codegen.runtime.tool_index import SERVER_INDEX_FILE, write_server_index
 
 def test_search_tools():
     """Test search_tools function."""
@@ -67,5 +71,240 @@ def test_tool_ref_get_summary():
         assert "Test tool" in summary
         assert not ref.loaded  # Should not have loaded the module
 
+def test_tool_ref_get_summary_skips_header_comments(tmp_path):
+    """get_summary() finds the docstring after comments and stops at Params."""
+    tool_file = tmp_path / "tool.py"
+    tool_file.write_text(
+        '#!/usr/bin/env python\n# -*- coding: utf-8 -*-\n\n'
+        '"""\nGet the forecast\nfor a location.\nParams: lat, lon\n"""\n'
+        + "x = 1\n" * 2000,
+        encoding="utf-8",
+    )
+
+    ref = ToolRef(server="weather", tool="tool", module_path=str(tool_file))
+    assert ref.get_summary() == "Get the forecast for a location."
+
+def test_tool_ref_get_summary_cache_follows_mtime(tmp_path):
+    """Cached summaries are keyed by mtime, so an edited file is reread."""
+    tool_file = tmp_path / "tool.py"
+    tool_file.write_text('"""First"""')
+    assert ToolRef("s", "tool", str(tool_file)).get_summary() == "First"
+
+    tool_file.write_text('"""Second"""')
+    mtime_ns = tool_file.stat().st_mtime_ns + 1_000_000_000
+    os.utime(tool_file, ns=(mtime_ns, mtime_ns))
+    assert ToolRef("s", "tool", str(tool_file)).get_summary() == "Second"
+
+def test_tool_ref_is_slotted_and_hashable():
+    """ToolRef has no __dict__ and compares by server, tool and path only."""
+    ref = ToolRef("github", "create_pr", "servers/github/create_pr.py")
+    same = ToolRef("github", "create_pr", "servers/github/create_pr.py", summary="Create a PR")
+
+    assert not hasattr(ref, "__dict__")
+    assert ref == same
+    assert {ref: 1}[same] == 1
+    with pytest.raises(AttributeError):
+        ref.summary = "changed"
+
+def test_tool_ref_load_reuses_module(tmp_path):
+    """load() registers the module once; refs to another file get their own module."""
+    for root in ("a", "b"):
+        server_dir = tmp_path / root / "github"
+        server_dir.mkdir(parents=True)
+        (server_dir / "create_pr.py").write_text(f"ROOT = {root!r}\n")
+
+    try:
+        first = ToolRef("github", "create_pr", str(tmp_path / "a" / "github" / "create_pr.py"))
+        second = ToolRef("github", "create_pr", str(tmp_path / "a" / "github" / "create_pr.py"))
+        module = first.load()
+        assert first.loaded
+        assert second.load() is module
+        assert sys.modules[module.__name__] is module
+        assert module.__name__.endswith(".github.create_pr")
+        assert not module.__name__.startswith("servers.")
+
+        other = ToolRef("github", "create_pr", str(tmp_path / "b" / "github" / "create_pr.py"))
+        assert other.load().ROOT == "b"
+    finally:
+        _cleanup_loaded()
+    assert module.__name__ not in sys.modules
+    assert not any(name.startswith("servers.") for name in sys.modules)
+
+def test_tool_ref_load_failure_leaves_no_module(tmp_path):
+    """A module that fails to import isn't left in sys.modules or marked loaded."""
+    tool_file = tmp_path / "broken.py"
+    tool_file.write_text("raise RuntimeError('boom')\n")
+    ref = ToolRef("github", "broken", str(tool_file))
+
+    with pytest.raises(RuntimeError):
+        ref.load()
+    assert not ref.loaded
+    assert not any(name.endswith(".github.broken") for name in sys.modules)
+
+def _make_servers(root, tools_by_server):
+    """Create server dirs with one-line-docstring tool files, backdated by a minute."""
+    for server, tools in tools_by_server.items():
+        server_dir = root / server
+        server_dir.mkdir()
+        (server_dir / "__init__.py").write_text("")
+        # Older than any index written below, so the index isn't racily clean
+        past = server_dir.stat().st_mtime_ns - 60_000_000_000
+        for tool, summary in tools.items():
+            (server_dir / f"{tool}.py").write_text(f'"""{summary}"""')
+            os.utime(server_dir / f"{tool}.py", ns=(past, past))
+        os.utime(server_dir, ns=(past, past))
+
+def test_search_tools_uses_saved_index(tmp_path):
+    """Summaries come from the saved index until their tool file changes."""
+    _make_servers(tmp_path, {"weather": {"get_forecast": "Get the forecast"}})
+    build_search_index(str(tmp_path))
+    index = json.loads((tmp_path / INDEX_FILE).read_text(encoding="utf-8"))
+    assert index["docs"] == [["weather", "get_forecast", "Get the forecast"]]
+
+    # Rewritten after the tool file, so its summary is trusted as is
+    index["docs"][0][2] = "Indexed forecast"
+    (tmp_path / INDEX_FILE).write_text(json.dumps(index), encoding="utf-8")
+    tools = search_tools("forecast", servers_dir=str(tmp_path), detail="basic")
+    assert tools[0].summary == "Indexed forecast"
+
+    # Editing a file in place leaves its directory's mtime alone, but not its own
+    (tmp_path / "weather" / "get_forecast.py").write_text('"""Changed"""')
+    tools = search_tools("forecast", servers_dir=str(tmp_path), detail="basic")
+    assert tools[0].summary == "Changed"
+
+def test_search_tools_saves_index_and_skips_unchanged_servers(tmp_path, monkeypatch):
+    """A rebuilt index is saved; while no server dir changes, searches don't touch tool files."""
+    _make_servers(tmp_path, {
+        "weather": {"get_forecast": "Get the forecast"},
+        "traffic": {"get_jams": "Get traffic jams"},
+    })
+    assert len(search_tools("get", servers_dir=str(tmp_path))) == 2
+    assert (tmp_path / INDEX_FILE).exists()
+
+    def fail(*args):
+        raise AssertionError(f"touched tool files: {args}")
+
+    monkeypatch.setattr(search, "_scan_server", fail)
+    monkeypatch.setattr(search, "file_summary", fail)
+    tools = search_tools("forecast", servers_dir=str(tmp_path), detail="basic")
+    assert tools[0].summary == "Get the forecast"
+
+    # A new process starts from the saved index
+    search._INDEX_CACHE.clear()
+    assert [t.tool for t in search_tools("jams", servers_dir=str(tmp_path))] == ["get_jams"]
+
+def test_search_tools_rescans_only_changed_servers(tmp_path, monkeypatch):
+    """Adding a tool rescans its server only."""
+    _make_servers(tmp_path, {
+        "weather": {"get_forecast": "Get the forecast"},
+        "traffic": {"get_jams": "Get traffic jams"},
+    })
+    search_tools("get", servers_dir=str(tmp_path))
+
+    scanned = []
+    scan_server = search._scan_server
+    monkeypatch.setattr(search, "_scan_server", lambda servers_dir, server: scanned.append(server) or scan_server(servers_dir, server))
+    (tmp_path / "weather" / "get_alerts.py").write_text('"""Weather alerts"""')
+
+    assert [t.tool for t in search_tools("get", servers_dir=str(tmp_path))] == ["get_jams", "get_alerts", "get_forecast"]
+    assert scanned == ["weather"]
+
+def test_read_index_rejects_inconsistent_file(tmp_path):
+    """A saved index whose docs and stats differ in length is ignored and rebuilt."""
+    _make_servers(tmp_path, {"weather": {"get_forecast": "Get the forecast"}})
+    build_search_index(str(tmp_path))
+    index = json.loads((tmp_path / INDEX_FILE).read_text(encoding="utf-8"))
+    index["stats"].append([0, 0])
+    (tmp_path / INDEX_FILE).write_text(json.dumps(index), encoding="utf-8")
+
+    assert search._read_index(str(tmp_path)) is None
+    assert [t.tool for t in search_tools("forecast", servers_dir=str(tmp_path))] == ["get_forecast"]
+
+def test_search_tools_rebuilds_stale_index(tmp_path):
+    """A tool file added after the index was built is found by the next search."""
+    _make_servers(tmp_path, {"weather": {"get_forecast": "Get the forecast"}})
+    assert search_tools("alerts", servers_dir=str(tmp_path)) == []
+
+    (tmp_path / "weather" / "get_alerts.py").write_text('"""Weather alerts"""')
+
+    assert [t.tool for t in search_tools("alerts", servers_dir=str(tmp_path))] == ["get_alerts"]
+
+def test_search_tools_summary_and_short_queries(tmp_path):
+    """Summaries only match above the name detail level; short queries still match."""
+    _make_servers(tmp_path, {
+        "github": {"create_pr": "Open a pull request"},
+        "weather": {"get_forecast": "Get the forecast"},
+    })
+
+    assert search_tools("pull request", servers_dir=str(tmp_path)) == []
+    tools = search_tools("pull request", servers_dir=str(tmp_path), detail="basic")
+    assert [(t.server, t.tool, t.summary) for t in tools] == [("github", "create_pr", "Open a pull request")]
+
+    assert [t.tool for t in search_tools("pr", servers_dir=str(tmp_path))] == ["create_pr"]
+    assert len(search_tools("", servers_dir=str(tmp_path))) == 2
+
+def test_search_tools_multiple_tokens(tmp_path):
+    """A list of queries matches tools matching any of them."""
+    _make_servers(tmp_path, {
+        "github": {"create_pr": "Open a pull request"},
+        "weather": {"get_forecast": "Get the forecast", "get_temp": "Current temperature"},
+    })
+
+    tools = search_tools(["temperature", "pr"], servers_dir=str(tmp_path), detail="basic")
+    assert [t.tool for t in tools] == ["create_pr", "get_temp"]
+
+    # Names only at the default detail level; a single-item list is a plain query
+    assert [t.tool for t in search_tools(["temperature", "temp"], servers_dir=str(tmp_path))] == ["get_temp"]
+    assert search_tools(["forecast"], servers_dir=str(tmp_path))[0].tool == "get_forecast"
+    assert search_tools([], servers_dir=str(tmp_path)) == []
+
+def test_search_tools_many_servers_keeps_order(tmp_path):
+    """Servers scanned in parallel still come back sorted by server and tool."""
+    _make_servers(tmp_path, {
+        f"server{i}": {"tool_b": "Second tool", "tool_a": "First tool"}
+        for i in range(5)
+    })
+
+    tools = search_tools("tool", servers_dir=str(tmp_path))
+
+    assert [(t.server, t.tool) for t in tools] == [
+        (f"server{i}", name) for i in range(5) for name in ("tool_a", "tool_b")
+    ]
+
+def test_search_tools_uses_server_index(tmp_path):
+    """A server's .index.json supplies summaries only for tool files unchanged since it was written."""
+    _make_servers(tmp_path, {
+        "weather": {"get_forecast": "Get the forecast"},
+        "traffic": {"get_jams": "Get traffic jams", "get_roads": "Get roads", "get_works": "Get roadworks"},
+    })
+    write_server_index(str(tmp_path / "weather"), [("get_forecast", "Indexed forecast")])
+    write_server_index(str(tmp_path / "traffic"), [("get_jams", "Indexed jams"), ("get_works", "Indexed works")])
+    # Edited after the index was written (same size, so only the mtime differs)
+    (tmp_path / "traffic" / "get_works.py").write_text('"""Get roadwork!"""')
+
+    tools = search_tools("get", servers_dir=str(tmp_path), detail="basic")
+    assert {t.tool: t.summary for t in tools} == {
+        "get_forecast": "Indexed forecast",
+        "get_jams": "Indexed jams",
+        "get_roads": "Get roads",
+        "get_works": "Get roadwork!",
+    }
+    assert SERVER_INDEX_FILE not in list_tools("weather", str(tmp_path))
+
+def test_search_tools_large_index(tmp_path):
+    """Indexes past the numpy threshold give the same results (numpy or not)."""
+    _make_servers(tmp_path, {
+        server: {f"tool_{i:04d}": f"Tool number {i}" for i in range(520)}
+        for server in ("alpha", "beta")
+    })
+
+    tools = search_tools(["tool_0007", "number 519"], servers_dir=str(tmp_path), detail="basic")
+    assert [(t.server, t.tool) for t in tools] == [
+        ("alpha", "tool_0007"), ("alpha", "tool_0519"), ("beta", "tool_0007"), ("beta", "tool_0519"),
+    ]
+    assert tools[0].summary == "Tool number 7"
+    assert search_tools("number 519", servers_dir=str(tmp_path)) == []
+    assert len(search_tools("beta", servers_dir=str(tmp_path))) == 520
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,175 @@
+"""Test Claude Code skill generation."""
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from mcp_codegen import skill_generator
+from mcp_codegen.skill_generator import (
+    _atomic_write,
+    _categorize_tools,
+    _short,
+    generate_multi_server_skill,
+    generate_skill,
+)
+
+
+class MockTool:
+    """Mock tool for testing."""
+    def __init__(self, name, description=""):
+        self.name = name
+        self.description = description
+
+
+def test_categorize_tools_by_keyword():
+    """Test tools are grouped by name and description keywords."""
+    tools = [
+        MockTool("get_forecast", "Weather forecast for a location"),
+        MockTool("list_incidents", "Current traffic incidents"),
+        MockTool("camera_images", ""),
+        MockTool("find_near", "Find things"),
+        MockTool("search_docs", "Search documentation"),
+        MockTool("ping", "Health check"),
+    ]
+
+    categories = _categorize_tools(tools)
+
+    assert [t.name for t, _ in categories["weather"]] == ["get_forecast"]
+    assert [t.name for t, _ in categories["traffic"]] == ["list_incidents"]
+    assert [t.name for t, _ in categories["camera"]] == ["camera_images"]
+    assert [t.name for t, _ in categories["location"]] == ["find_near"]
+    assert [t.name for t, _ in categories["data"]] == ["search_docs"]
+    assert [t.name for t, _ in categories["other"]] == ["ping"]
+
+
+def test_categorize_tools_priority_and_order():
+    """Test earlier categories win and empty categories are dropped."""
+    tools = [
+        MockTool("get_road_weather"),  # weather beats road and data
+        MockTool("getraffic"),  # overlapping keywords: traffic beats data
+        MockTool("ping", "Lists nearby items"),  # location/data only match names
+    ]
+
+    categories = _categorize_tools(tools)
+
+    assert list(categories) == ["weather", "traffic", "other"]
+    assert categories["weather"][0][0].name == "get_road_weather"
+    assert categories["traffic"][0][0].name == "getraffic"
+    assert categories["other"][0] == (tools[2], "Lists nearby items")
+
+
+def test_generate_skill(tmp_path):
+    """Test SKILL.md is written with frontmatter and tool sections."""
+    tools = [
+        MockTool("get_forecast", "Weather forecast for a location"),
+        MockTool("ping", "Health check"),
+    ]
+
+    skill_path = generate_skill("smhi", "https://example.com", tools, output_dir=str(tmp_path))
+
+    assert Path(skill_path) == tmp_path / "mcp-smhi"
+    content = (Path(skill_path) / "SKILL.md").read_text(encoding="utf-8")
+    assert content.startswith("---\nname: mcp-smhi\ndescription: Access SMHI MCP server tools")
+    assert content.count("description:") == 1
+    assert "### Weather Tools\n\n- `get_forecast`: Weather forecast for a location" in content
+    assert "### Other Tools\n\n- `ping`: Health check" in content
+    assert "from servers.smhi.get_forecast import call, Params" in content
+
+
+def test_generate_skill_builds_description_once(tmp_path, monkeypatch):
+    """Test the skill description is computed once and reused for rendering."""
+    calls = []
+    original = skill_generator._generate_description
+
+    def spy(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(skill_generator, "_generate_description", spy)
+    generate_skill("smhi", "https://example.com", [MockTool("get_forecast")], output_dir=str(tmp_path))
+
+    assert len(calls) == 1
+
+
+def test_generate_skill_skips_unchanged(tmp_path, monkeypatch):
+    """Test regeneration with identical inputs skips rendering, and changes re-render."""
+    tools = [MockTool("get_forecast", "Weather forecast")]
+    skill_path = generate_skill("smhi", "https://example.com", tools, output_dir=str(tmp_path))
+    skill_file = Path(skill_path) / "SKILL.md"
+    assert "<!-- tools-hash: " in skill_file.read_text(encoding="utf-8")
+
+    renders = []
+    original = skill_generator._render_skill
+    monkeypatch.setattr(skill_generator, "_render_skill", lambda *args: renders.append(args) or original(*args))
+
+    generate_skill("smhi", "https://example.com", tools, output_dir=str(tmp_path))
+    assert renders == []
+
+    tools.append(MockTool("get_traffic", "Traffic flow"))
+    generate_skill("smhi", "https://example.com", tools, output_dir=str(tmp_path))
+    assert len(renders) == 1
+    assert "get_traffic" in skill_file.read_text(encoding="utf-8")
+
+
+def test_generate_skill_recreates_removed_dir(tmp_path):
+    """Test regeneration still works after the cached skill directory is deleted."""
+    tools = [MockTool("ping", "Health check")]
+    skill_path = generate_skill("smhi", "https://example.com", tools, output_dir=str(tmp_path))
+    shutil.rmtree(skill_path)
+
+    generate_skill("smhi", "https://example.com", tools, output_dir=str(tmp_path))
+
+    assert (Path(skill_path) / "SKILL.md").exists()
+
+
+def test_generate_multi_server_skill(tmp_path):
+    """Test the multi-server skill lists each server with its categories."""
+    servers = [
+        ("smhi", "https://smhi.example.com", [MockTool("get_forecast", "Weather forecast"), MockTool("ping")]),
+        ("empty", "https://empty.example.com", []),
+    ]
+
+    skill_path = generate_multi_server_skill(servers, output_dir=str(tmp_path))
+
+    content = (Path(skill_path) / "SKILL.md").read_text(encoding="utf-8")
+    assert content.startswith("---\nname: mcp-tools\ndescription: Access multiple MCP servers for other, weather.")
+    assert (
+        "## Available Servers\n\n"
+        "- **smhi** (2 tools: weather, other): https://smhi.example.com\n"
+        "- **empty** (0 tools): https://empty.example.com\n\n"
+    ) in content
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    """Test _atomic_write overwrites existing content and leaves no temp files."""
+    target = tmp_path / "SKILL.md"
+    target.write_bytes(b"old content that is longer")
+
+    _atomic_write(target, "ny text".encode("utf-8"))
+
+    assert target.read_bytes() == b"ny text"
+    assert [p.name for p in tmp_path.iterdir()] == ["SKILL.md"]
+
+
+def test_atomic_write_concurrent_threads(tmp_path):
+    """Test threads writing one file leave one writer's complete content."""
+    target = tmp_path / "SKILL.md"
+    payloads = [bytes([ord("a") + i]) * 100_000 for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda data: _atomic_write(target, data), payloads))
+
+    assert target.read_bytes() in payloads
+    assert [p.name for p in tmp_path.iterdir()] == ["SKILL.md"]
+
+
+def test_short():
+    """Test descriptions are truncated with an ellipsis only when too long."""
+    assert _short("a" * 100) == "a" * 100
+    assert _short("a" * 101) == "a" * 100 + "..."
+    assert _short("abcdef", limit=3) == "abc..."
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
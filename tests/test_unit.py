@@ -1,12 +1,18 @@
 """Unit tests for mcp-codegen utilities and edge cases."""
+import os
+import subprocess
+import sys
+import types
+from pathlib import Path
+
 import pytest
 import json
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import Mock, patch
 import httpx
 import respx
 
 from mcp_codegen.utils import read_first_sse_event, ensure_accept_headers
-from mcp_codegen.codegen import detect_transport
+from mcp_codegen.codegen import clear_transport_cache, detect_transport
 
 
 class TestUtils:
@@ -21,22 +27,66 @@ class TestUtils:
         headers = ensure_accept_headers(existing)
         assert headers["Accept"] == "application/json, text/event-stream"
         assert headers["Authorization"] == "Bearer token"
-    
+
+    def test_ensure_accept_headers_existing_accept(self):
+        """Test existing Accept values are kept only if both types are present."""
+        complete = {"Accept": "text/event-stream, application/json;q=0.9, Application/JSON"}
+        assert ensure_accept_headers(complete)["Accept"] == complete["Accept"]
+
+        partial = {"Accept": "application/json"}
+        assert ensure_accept_headers(partial)["Accept"] == "application/json, text/event-stream"
+        assert partial == {"Accept": "application/json"}  # Input is not modified
+
+    def test_ensure_accept_headers_returns_fresh_dict(self):
+        """Test mutating a returned dict does not affect later calls."""
+        existing = {"Authorization": "Bearer token"}
+        first = ensure_accept_headers(existing)
+        first["mcp-protocol-version"] = "2025-06-18"
+
+        second = ensure_accept_headers(existing)
+        assert second is not first
+        assert "mcp-protocol-version" not in second
+
     @pytest.mark.asyncio
     async def test_read_first_sse_event(self):
         """Test SSE event parsing."""
-        # Mock response with SSE data
-        mock_response = AsyncMock()
-        
-        # Create a proper async iterator
+        # The reader only uses aiter_bytes, so a plain namespace stands in for the response
         async def mock_aiter_bytes():
             yield b'data: {"result": {"tools": []}}\n\n'
-        
-        mock_response.aiter_bytes = mock_aiter_bytes
+
+        mock_response = types.SimpleNamespace(aiter_bytes=mock_aiter_bytes)
         
         result = await read_first_sse_event(mock_response)
         assert result == {"result": {"tools": []}}
 
+    @pytest.mark.asyncio
+    async def test_read_first_sse_event_split_chunks(self):
+        """Test SSE event split across chunks, including a multibyte character."""
+        payload = 'event: message\ndata: {"name": "Umeå"}\n\ndata: {"second": true}\n\n'.encode('utf-8')
+        split_char = payload.index("å".encode('utf-8')) + 1
+        split_sep = payload.index(b'\n\n') + 1
+
+        async def mock_aiter_bytes():
+            yield payload[:split_char]
+            yield payload[split_char:split_sep]
+            yield payload[split_sep:]
+
+        mock_response = types.SimpleNamespace(aiter_bytes=mock_aiter_bytes)
+
+        result = await read_first_sse_event(mock_response)
+        assert result == {"name": "Umeå"}
+
+    @pytest.mark.asyncio
+    async def test_read_first_sse_event_data_without_space(self):
+        """Test a data field with no space after the colon (allowed by the SSE spec)."""
+        async def mock_aiter_bytes():
+            yield b'id: 1\ndata:{"jsonrpc": "2.0"}\n\n'
+
+        mock_response = types.SimpleNamespace(aiter_bytes=mock_aiter_bytes)
+
+        result = await read_first_sse_event(mock_response)
+        assert result == {"jsonrpc": "2.0"}
+
 
 class TestTransportDetection:
     def test_detect_transport_unknown(self):
@@ -50,6 +100,44 @@ class TestTransportDetection:
         result = detect_transport("http://localhost:99999", verbose=True)
         assert result == "unknown"
 
+    @respx.mock
+    def test_detect_transport_caches_result(self):
+        """Test a detected transport is reused until cleared, with or without a trailing slash; unknown is not cached."""
+        clear_transport_cache()
+        head = respx.head("https://cached.example.com/mcp").respond(405)
+        respx.head("https://cached.example.com/sse").respond(404)
+        respx.post("https://cached.example.com/mcp").respond(400)
+
+        assert detect_transport("https://cached.example.com/") == "http-post"
+        calls = head.call_count
+        assert detect_transport("https://cached.example.com") == "http-post"
+        assert head.call_count == calls
+
+        clear_transport_cache()
+        assert detect_transport("https://cached.example.com") == "http-post"
+        assert head.call_count == 2 * calls
+
+        respx.head("https://down.example.com/mcp").mock(side_effect=httpx.ConnectError)
+        respx.head("https://down.example.com/sse").mock(side_effect=httpx.ConnectError)
+        down = respx.post("https://down.example.com/mcp").mock(side_effect=httpx.ConnectError)
+        assert detect_transport("https://down.example.com") == "unknown"
+        assert detect_transport("https://down.example.com") == "unknown"
+        assert down.call_count == 2
+
+    @respx.mock
+    def test_detect_transport_caches_mcp_url_separately(self):
+        """Test "x" and "x/mcp" are cached apart, since they probe different SSE endpoints."""
+        clear_transport_cache()
+        respx.head("https://sse-only.example.com/sse").respond(200, headers={"content-type": "text/event-stream"})
+        respx.route(host="sse-only.example.com").respond(404)
+
+        assert detect_transport("https://sse-only.example.com") == "sse"
+        assert detect_transport("https://sse-only.example.com/mcp") == "unknown"
+
+        clear_transport_cache()
+        assert detect_transport("https://sse-only.example.com/mcp") == "unknown"
+        assert detect_transport("https://sse-only.example.com") == "sse"
+
 
 class TestPostSSEBranch:
     @respx.mock
@@ -71,3 +159,234 @@ class TestPostSSEBranch:
         # This would test the actual code path when implemented
         # For now, just verify the route setup
         assert route is not None  # Route was created successfully
+
+
+class TestStreamableSchema:
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_fetch_schema_lists_tools_in_open_session(self):
+        """Test fetch_schema lists tools over streamable-http without falling back to HTTP POST."""
+        from mcp_codegen.codegen import fetch_schema
+
+        methods = []
+
+        def rpc(request):
+            body = json.loads(request.content)
+            methods.append(body["method"])
+            if "id" not in body:
+                return httpx.Response(202)
+            if body["method"] == "initialize":
+                result = {
+                    "protocolVersion": body["params"]["protocolVersion"],
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": "stream", "version": "1.0"},
+                }
+            else:
+                result = {"tools": [{
+                    "name": "ping",
+                    "description": "Ping",
+                    "inputSchema": {"type": "object", "properties": {"n": {"type": "integer"}}, "required": ["n"]},
+                }]}
+            message = {"jsonrpc": "2.0", "id": body["id"], "result": result}
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream", "mcp-session-id": "abc"},
+                text=f"event: message\ndata: {json.dumps(message)}\n\n",
+            )
+
+        respx.post("https://stream.example.com/mcp").mock(side_effect=rpc)
+        respx.get("https://stream.example.com/mcp").respond(405)
+        respx.delete("https://stream.example.com/mcp").respond(200)
+
+        tools = await fetch_schema("https://stream.example.com", transport="streamable-http", timeout_seconds=2)
+
+        assert methods == ["initialize", "notifications/initialized", "tools/list"]
+        assert [t.name for t in tools] == ["ping"]
+        assert tools[0].input_schema.properties == {"n": {"type": "integer"}}
+        assert tools[0].input_schema.required == ["n"]
+
+
+class TestSharedClient:
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_call_reuses_client_without_mutating_it(self, capsys):
+        """Test _call uses a passed client, leaves it open, and keeps session headers per request."""
+        from mcp_codegen.cli import _call
+
+        route = respx.post("https://example.com/mcp").mock(side_effect=[
+            httpx.Response(200, json={"result": {"protocolVersion": "2025-06-18"}},
+                           headers={"mcp-session-id": "abc"}),
+            httpx.Response(200, json={"result": {"content": [{"type": "text", "text": "ok"}]}}),
+        ])
+
+        async with httpx.AsyncClient() as client:
+            await _call("https://example.com", "ping", [], client=client)
+
+            assert not client.is_closed
+            assert "mcp-session-id" not in client.headers
+        assert route.calls[1].request.headers["mcp-session-id"] == "abc"
+        assert capsys.readouterr().out == "ok\n"
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_call_writes_to_out(self, capsys):
+        """Test _call writes the result to the given stream instead of stdout."""
+        from io import StringIO
+        from mcp_codegen.cli import _call
+
+        respx.post("https://example.com/mcp").mock(side_effect=[
+            httpx.Response(200, json={"result": {}}),
+            httpx.Response(200, json={"result": {"content": [{"type": "text", "text": "ok"}]}}),
+        ])
+
+        out = StringIO()
+        await _call("https://example.com", "ping", [], out=out)
+
+        assert out.getvalue() == "ok\n"
+        assert capsys.readouterr().out == ""
+
+    @pytest.mark.asyncio
+    async def test_clients_share_connections_within_pool(self):
+        """Test Clients in a ConnectionPool block share its connections, which close with the block."""
+        from mcp_codegen.client import Client, ConnectionPool, _SharedTransport
+
+        async with ConnectionPool() as pool:
+            async with Client("https://pooled.example.com/") as first:
+                http = await first._get_http_client()
+                pooled = http._transport._transport
+                async with Client("https://pooled.example.com") as second:
+                    assert (await second._get_http_client())._transport._transport is pooled
+                async with Client("https://other.example.com") as other:
+                    assert (await other._get_http_client())._transport._transport is not pooled
+            assert http.is_closed
+            assert len(pool._transports) == 2
+
+        assert pool._transports == {}
+        async with Client("https://pooled.example.com") as unpooled:
+            assert not isinstance((await unpooled._get_http_client())._transport, _SharedTransport)
+
+    @staticmethod
+    def _pool_server(base_url):
+        """Mock a POST-only MCP server answering every tool call with "pong"."""
+        def rpc(request):
+            body = json.loads(request.content)
+            if body["method"] == "initialize":
+                result = {"protocolVersion": "2025-06-18"}
+            else:
+                result = {"content": [{"type": "text", "text": "pong"}]}
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+        clear_transport_cache()
+        respx.head(f"{base_url}/mcp").respond(405)
+        respx.head(f"{base_url}/sse").respond(404)
+        respx.post(f"{base_url}/mcp").mock(side_effect=rpc)
+
+    @respx.mock
+    def test_pool_leaks_nothing_when_loop_closed_without_shutdown(self):
+        """Test a loop closed without shutdown_asyncgens() leaves no pool or loop behind."""
+        import asyncio
+        import gc
+        import weakref
+        from mcp_codegen.client import Client, ConnectionPool
+
+        self._pool_server("https://leak.example.com")
+
+        async def call_in_pool():
+            pool = ConnectionPool()
+            await pool.__aenter__()  # Never exited, as if the loop died mid-block
+            async with Client("https://leak.example.com") as client:
+                await client.call_tool("ping", {})
+            return weakref.ref(pool)
+
+        loop = asyncio.new_event_loop()
+        pool_ref = loop.run_until_complete(call_in_pool())
+        loop.close()
+        loop_ref = weakref.ref(loop)
+        del loop
+        gc.collect()
+
+        assert loop_ref() is None
+        assert pool_ref() is None
+
+    @respx.mock
+    def test_generated_calls_share_pool_under_trio(self, tmp_path):
+        """Test generated tool calls in a ConnectionPool reuse one transport under trio too."""
+        pytest.importorskip("trio")
+        import anyio
+        from mcp_codegen.client import ConnectionPool
+        from mcp_codegen.fs_layout import generate_fs_layout
+        from mcp_codegen.runtime.search import ToolRef, _cleanup_loaded
+
+        self._pool_server("https://pool.example.com")
+        schema = types.SimpleNamespace(properties={}, required=[])
+        tool = types.SimpleNamespace(name="ping", description="Ping", input_schema=schema)
+        generate_fs_layout("https://pool.example.com", "pool", [tool], str(tmp_path))
+
+        async def call_three_times(module):
+            async with ConnectionPool() as pool:
+                for _ in range(3):
+                    result = await module.call("https://pool.example.com", module.Params())
+                    assert result == {"content": [{"type": "text", "text": "pong"}]}
+                assert list(pool._transports) == ["https://pool.example.com"]
+            assert pool._transports == {}
+
+        try:
+            module = ToolRef("pool", "ping", str(tmp_path / "pool" / "ping.py")).load()
+            anyio.run(call_three_times, module, backend="trio")
+            # Without a pool each call uses and closes its own connections
+            assert module.call_sync("https://pool.example.com", module.Params()) == {"content": [{"type": "text", "text": "pong"}]}
+        finally:
+            _cleanup_loaded()
+
+
+class TestWorkspace:
+    def test_read_short_reads_and_missing_file(self, tmp_path, monkeypatch):
+        """Test read() reassembles a file returned in several short reads, and None for a missing file."""
+        monkeypatch.chdir(tmp_path)  # The module creates a default workspace in the cwd
+        from mcp_codegen.runner.workspace import Workspace
+
+        ws = Workspace(str(tmp_path / "ws"))
+        ws.write("notes.txt", "Umeå weather")
+
+        real_read = os.read
+        monkeypatch.setattr(os, "read", lambda fd, n: real_read(fd, min(n, 3)))
+        assert ws.read("notes.txt") == "Umeå weather"
+        assert ws.read("missing.txt") is None
+
+    def test_read_translates_newlines(self, tmp_path, monkeypatch):
+        """Test read() returns CRLF and CR line endings as newlines, like text-mode open()."""
+        monkeypatch.chdir(tmp_path)
+        from mcp_codegen.runner.workspace import Workspace
+
+        ws = Workspace(str(tmp_path / "ws"))
+        (tmp_path / "ws" / "lines.txt").write_bytes(b"one\r\ntwo\rthree\n")
+        assert ws.read("lines.txt") == "one\ntwo\nthree\n"
+
+
+class TestLazyImports:
+    def test_runtime_import_is_lightweight(self):
+        """Importing mcp_codegen.runtime loads neither the CLI/codegen nor httpx."""
+        code = (
+            "import sys, mcp_codegen.runtime as runtime\n"
+            "loaded = sorted(m for m in sys.modules if m == 'httpx' or m.startswith('mcp_codegen.'))\n"
+            "assert loaded == ['mcp_codegen.constants', 'mcp_codegen.runtime'], loaded\n"
+            "runtime.search_tools\n"
+            "assert 'httpx' not in sys.modules\n"
+        )
+        env = {**os.environ, "PYTHONPATH": str(Path(__file__).parent.parent / "src")}
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+        assert result.returncode == 0, result.stderr
+
+    def test_runtime_exports(self):
+        """Every name in __all__ resolves and shows up in dir()."""
+        import mcp_codegen
+        import mcp_codegen.runtime as runtime
+        from mcp_codegen.client import Client
+
+        assert runtime.Client is Client
+        for package in (mcp_codegen, runtime):
+            for name in package.__all__:
+                assert getattr(package, name) is not None
+                assert name in dir(package)
+        with pytest.raises(AttributeError):
+            runtime.missing